@@ -231,6 +231,8 @@ Examples:
             console.print(f"\n[bold red]✗ Scan failed:[/bold red] {str(e)}")
             self.logger.exception("Scan error")
             sys.exit(1)
+        finally:
+            await self.scanner.close()
     
     async def cmd_resume(self, args):
         """Resume interrupted scan"""
@@ -526,6 +528,13 @@ Examples:
 
 def main():
     """CLI entry point"""
+    # uvloop (POSIX only, optional) runs the asyncio/aiohttp scan I/O faster
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     cli = EMYUELCLI()
     try:
         asyncio.run(cli.run())
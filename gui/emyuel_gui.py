@@ -1277,9 +1277,12 @@ class EMYUELGUI:
         self.root.after(0, lambda: self.log_console("[AI] Initializing AI scanner..."))
         self.root.after(0, lambda: self.progress_var.set(50))
         
-        results = loop.run_until_complete(
-            scanner.scan(target=target, modules=modules, scan_id=scan_id)
-        )
+        try:
+            results = loop.run_until_complete(
+                scanner.scan(target=target, modules=modules, scan_id=scan_id)
+            )
+        finally:
+            loop.run_until_complete(scanner.close())
         loop.close()
         
         # Save AI results to database
@@ -1399,13 +1402,16 @@ class EMYUELGUI:
                 self.root.after(0, lambda: self.log_console("[SCAN] Initializing scanner..."))
                 self.root.after(0, lambda: self.progress_var.set(5))
                 
-                results = loop.run_until_complete(
-                    scanner.scan(
-                        target=target,
-                        modules=modules,
-                        scan_id=scan_id
+                try:
+                    results = loop.run_until_complete(
+                        scanner.scan(
+                            target=target,
+                            modules=modules,
+                            scan_id=scan_id
+                        )
                     )
-                )
+                finally:
+                    loop.run_until_complete(scanner.close())
                 
                 # Store last scan results (keep for backwards compatibility)
                 self.last_scan_results = results
@@ -1833,14 +1839,17 @@ class EMYUELGUI:
             self.root.after(0, lambda: self.log_console("[SCAN] Initializing scanner..."))
             self.root.after(0, lambda: self.progress_var.set(5))
             
-            results = loop.run_until_complete(
-                scanner.scan(
-                    target=target,
-                    modules=modules,
-                    scan_id=scan_id,
-                    resume_state=resume_state
+            try:
+                results = loop.run_until_complete(
+                    scanner.scan(
+                        target=target,
+                        modules=modules,
+                        scan_id=scan_id,
+                        resume_state=resume_state
+                    )
                 )
-            )
+            finally:
+                loop.run_until_complete(scanner.close())
             
             self.last_scan_results = results
             
@@ -5023,6 +5032,13 @@ Status: {scan['status']}"""
 
 def main():
     """GUI entry point"""
+    # uvloop (POSIX only, optional) runs the asyncio/aiohttp scan I/O faster
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     app = EMYUELGUI()
     app.run()
 
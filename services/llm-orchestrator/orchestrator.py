@@ -7,9 +7,12 @@ handles failover, and provides a unified interface for security analysis.
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from enum import Enum
 
+import orjson
+
 from .providers.base import (
     LLMProvider,
     ProviderType,
@@ -24,6 +27,8 @@ from .providers.base import (
 from .providers.openai_provider import OpenAIProvider
 from .providers.gemini_provider import GeminiProvider
 from .providers.claude_provider import ClaudeProvider
+from .providers.response_cache import ResponseCache, DEFAULT_TTL
+from .providers.simhash import SimhashIndex, simhash
 
 
 logger = logging.getLogger(__name__)
@@ -46,6 +51,11 @@ class LLMOrchestrator:
                 - primary_provider: openai/gemini/claude
                 - fallback_enabled: bool
                 - providers: dict with provider configs
+                - dataflow_cache_enabled: cache data flow results on disk
+                - dataflow_cache_path: cache file (persist it between CI runs)
+                - dataflow_cache_ttl: seconds before cached results expire
+                - dataflow_near_duplicate_distance: simhash distance at which
+                  a cached result is reused for a near-identical file (0: off)
         """
         self.config = config
         self.primary_provider_type = ProviderType(config.get('primary_provider', 'openai'))
@@ -69,9 +79,26 @@ class LLMOrchestrator:
                 ProviderType.GEMINI.value: 0,
                 ProviderType.CLAUDE.value: 0
             },
-            'total_tokens_used': 0
+            'total_tokens_used': 0,
+            'dataflow_cache_hits': 0,
+            'dataflow_cache_near_hits': 0,
+            'dataflow_cache_misses': 0
         }
         
+        # Optional persistent cache of data flow results, so files that are
+        # unchanged since an earlier scan skip the LLM entirely
+        self.dataflow_cache = None
+        if config.get('dataflow_cache_enabled', False):
+            self.dataflow_cache = ResponseCache(
+                config.get('dataflow_cache_path') or Path.home() / ".emyuel" / "dataflow_cache.db",
+                ttl=config.get('dataflow_cache_ttl', DEFAULT_TTL)
+            )
+        
+        # Fingerprints of the sources cached in this run, per prompt variant
+        # (sources, sinks, vulnerability types), for near-duplicate reuse
+        self.near_duplicate_distance = config.get('dataflow_near_duplicate_distance', 3)
+        self._dataflow_neighbors: Dict[str, SimhashIndex] = {}
+        
         logger.info(f"LLM Orchestrator initialized with primary provider: {self.primary_provider_type.value}")
         logger.info(f"Configured providers: {list(self.providers.keys())}")
     
@@ -269,13 +296,170 @@ class LLMOrchestrator:
         """
         Trace data flow from source to sink (with fallback)
         """
-        return await self._execute_with_fallback(
+        key, cached = await self._get_cached_dataflow(source_code, entry_points, dangerous_sinks, context)
+        if cached is not None:
+            return cached
+        
+        result = await self._execute_with_fallback(
             'trace_data_flow',
             source_code=source_code,
             entry_points=entry_points,
             dangerous_sinks=dangerous_sinks,
             context=context
         )
+        
+        await self._store_dataflow(key, result)
+        return result
+    
+    async def trace_data_flow_stream(
+        self,
+        source_code: str,
+        entry_points: List[str],
+        dangerous_sinks: List[str],
+        context: Dict[str, Any],
+        on_finding: Callable[[Dict[str, Any]], None]
+    ) -> AnalysisResult:
+        """
+        Trace data flow, reporting findings as they stream in (with fallback)
+        
+        A finding already reported by a provider that then failed is not
+        reported again when the fallback provider returns it too.
+        """
+        key, cached = await self._get_cached_dataflow(source_code, entry_points, dangerous_sinks, context)
+        if cached is not None:
+            for finding in cached.findings:
+                on_finding(finding)
+            return cached
+        
+        reported = []
+        
+        def report(finding: Dict[str, Any]):
+            if finding not in reported:
+                reported.append(finding)
+                on_finding(finding)
+        
+        result = await self._execute_with_fallback(
+            'trace_data_flow_stream',
+            source_code=source_code,
+            entry_points=entry_points,
+            dangerous_sinks=dangerous_sinks,
+            context=context,
+            on_finding=report
+        )
+        
+        await self._store_dataflow(key, result)
+        return result
+    
+    async def trace_data_flow_batched(
+        self,
+        entries: List[Dict[str, Any]],
+        entry_points: List[str],
+        dangerous_sinks: List[str],
+        context: Dict[str, Any]
+    ) -> Dict[str, AnalysisResult]:
+        """
+        Trace data flow in several files with shared requests (with fallback)
+        """
+        results = {}
+        keys = {}
+        pending = []
+        for entry in entries:
+            entry_context = {**context, "file_path": entry["id"]}
+            key, cached = await self._get_cached_dataflow(entry["code"], entry_points, dangerous_sinks, entry_context)
+            if cached is not None:
+                results[entry["id"]] = cached
+            else:
+                keys[entry["id"]] = key
+                pending.append(entry)
+        
+        if pending:
+            fresh = await self._execute_with_fallback(
+                'trace_data_flow_batched',
+                entries=pending,
+                entry_points=entry_points,
+                dangerous_sinks=dangerous_sinks,
+                context=context
+            )
+            
+            # _execute_with_fallback only counts tokens of single results
+            self.usage_stats['total_tokens_used'] += sum(result.tokens_used for result in fresh.values())
+            
+            for entry_id, result in fresh.items():
+                await self._store_dataflow(keys.get(entry_id), result)
+            results.update(fresh)
+        
+        return results
+    
+    async def _get_cached_dataflow(
+        self,
+        source_code: str,
+        entry_points: List[str],
+        dangerous_sinks: List[str],
+        context: Dict[str, Any]
+    ) -> Tuple[Optional[Tuple[str, str, Optional[int]]], Optional[AnalysisResult]]:
+        """
+        Look up a cached data flow result
+        
+        The key covers the code, sources, sinks, vulnerability type(s) and
+        configured models, not the file path, so moved files also hit. On an
+        exact miss, a result cached earlier in this run for a near-identical
+        source (simhash within near_duplicate_distance) is reused with its
+        confidence lowered by 10%.
+        
+        Returns:
+            (lookup, cached result or None); lookup is None when caching is
+            off and is passed back to _store_dataflow
+        """
+        if self.dataflow_cache is None:
+            return None, None
+        
+        variant = ResponseCache.make_key(
+            'trace_data_flow',
+            [(provider_type.value, provider.model) for provider_type, provider in self.providers.items()],
+            entry_points,
+            dangerous_sinks,
+            context.get('vulnerability_type'),
+            context.get('vulnerability_types')
+        )
+        key = ResponseCache.make_key(variant, source_code)
+        fingerprint = simhash(source_code) if self.near_duplicate_distance > 0 else None
+        lookup = (key, variant, fingerprint)
+        
+        cached = await asyncio.to_thread(self.dataflow_cache.get, key)
+        if cached is not None:
+            self.usage_stats['dataflow_cache_hits'] += 1
+            self._index_dataflow(lookup)
+            result = AnalysisResult.from_dict(orjson.loads(cached[0]))
+            result.metadata = context
+            return lookup, result
+        
+        neighbors = self._dataflow_neighbors.get(variant)
+        if fingerprint is not None and neighbors is not None:
+            near_key = neighbors.find(fingerprint, self.near_duplicate_distance)
+            cached = await asyncio.to_thread(self.dataflow_cache.get, near_key) if near_key is not None else None
+            if cached is not None:
+                self.usage_stats['dataflow_cache_near_hits'] += 1
+                result = AnalysisResult.from_dict(orjson.loads(cached[0]))
+                result.confidence_score *= 0.9
+                result.metadata = {**context, 'near_duplicate': True}
+                return lookup, result
+        
+        self.usage_stats['dataflow_cache_misses'] += 1
+        return lookup, None
+    
+    def _index_dataflow(self, lookup: Tuple[str, str, Optional[int]]):
+        """Make a cached result findable for near-duplicate sources"""
+        key, variant, fingerprint = lookup
+        if fingerprint is not None:
+            self._dataflow_neighbors.setdefault(variant, SimhashIndex()).add(fingerprint, key)
+    
+    async def _store_dataflow(self, lookup: Optional[Tuple[str, str, Optional[int]]], result: AnalysisResult):
+        """Cache a successful data flow result"""
+        if lookup is not None and result.success:
+            await asyncio.to_thread(
+                self.dataflow_cache.set, lookup[0], orjson.dumps(result.to_dict()).decode(), result.tokens_used
+            )
+            self._index_dataflow(lookup)
     
     async def detect_vulnerability(
         self,
@@ -319,7 +503,13 @@ class LLMOrchestrator:
     
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get usage statistics"""
-        return self.usage_stats.copy()
+        stats = self.usage_stats.copy()
+        
+        hits = stats['dataflow_cache_hits'] + stats['dataflow_cache_near_hits']
+        lookups = hits + stats['dataflow_cache_misses']
+        stats['dataflow_cache_hit_rate'] = hits / lookups if lookups else 0.0
+        
+        return stats
     
     def get_provider_status(self) -> Dict[str, Any]:
         """Get status of all providers"""
@@ -335,6 +525,13 @@ class LLMOrchestrator:
         """Cleanup resources"""
         # Close any provider connections if needed
         logger.info("LLM Orchestrator shutting down")
+        
+        # Response caches keep their SQLite connection open
+        if self.dataflow_cache is not None:
+            self.dataflow_cache.close()
+        for provider in self.providers.values():
+            if getattr(provider, 'cache', None) is not None:
+                provider.cache.close()
 
 
 # Factory function for easy instantiation
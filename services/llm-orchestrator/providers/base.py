@@ -5,12 +5,20 @@ This module defines the contract that all LLM providers must implement.
 It ensures provider-agnostic behavior across OpenAI, Gemini, and Claude.
 """
 
+import asyncio
+import json
+import logging
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Awaitable, Callable, Tuple
 from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime
 
+from .rate_limit import AdaptiveLimiter
+
+
+logger = logging.getLogger(__name__)
+
 
 class ProviderType(Enum):
     """Supported LLM provider types"""
@@ -59,6 +67,23 @@ class AnalysisResult:
             "timestamp": self.timestamp.isoformat(),
             "metadata": self.metadata or {}
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AnalysisResult':
+        """Rebuild a result from its to_dict() representation"""
+        return cls(
+            success=data["success"],
+            analysis_type=AnalysisType(data["analysis_type"]),
+            findings=data["findings"],
+            confidence_score=data["confidence_score"],
+            reasoning=data["reasoning"],
+            provider=ProviderType(data["provider"]),
+            model_used=data["model_used"],
+            tokens_used=data["tokens_used"],
+            processing_time=data["processing_time"],
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            metadata=data.get("metadata")
+        )
 
 
 @dataclass
@@ -131,6 +156,116 @@ class CVSSScore:
         }
 
 
+def vuln_type_instruction(context: Dict[str, Any]) -> str:
+    """
+    Prompt suffix for data flow requests covering several vulnerability types
+    
+    When context["vulnerability_types"] lists more than one type, sinks are
+    passed prefixed with their type ("[SSRF] fetch(") and each finding is
+    asked to name the type it belongs to.
+    
+    Returns:
+        Instruction text, or "" for single-type requests
+    """
+    vuln_types = context.get("vulnerability_types") or []
+    if len(vuln_types) < 2:
+        return ""
+    
+    return (
+        "\nEach dangerous sink is prefixed with the vulnerability type it indicates in brackets. "
+        f"Add a \"vuln_type\" field to every finding, set to exactly one of: {', '.join(vuln_types)}.\n"
+    )
+
+
+class FindingsStream:
+    """
+    Extracts the "findings" of a JSON data flow response while it streams
+    
+    Feed response text as it arrives; each element of the top-level
+    "findings" array is reported as soon as its closing brace is seen.
+    finish() then reports whatever the stream missed, so every finding of
+    the final response is reported exactly once, in order.
+    """
+    
+    def __init__(self, on_finding: Callable[[Dict[str, Any]], None]):
+        """
+        Initialize stream
+        
+        Args:
+            on_finding: Called with each finding dict
+        """
+        self.on_finding = on_finding
+        self.reported = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key: Optional[List[str]] = None
+        self._last_key = None
+        self._in_findings = False
+        self._element: Optional[List[str]] = None
+        self._broken = False
+    
+    def feed(self, text: str):
+        """Consume the next piece of response text"""
+        if self._broken:
+            return
+        
+        for char in text:
+            if self._element is not None:
+                self._element.append(char)
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._key is not None:
+                        self._last_key = "".join(self._key)
+                        self._key = None
+                elif self._key is not None:
+                    self._key.append(char)
+                continue
+            
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._key = []
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 2 and char == "[" and self._last_key == "findings":
+                    self._in_findings = True
+                elif self._in_findings and self._depth == 3 and char == "{" and self._element is None:
+                    self._element = [char]
+            elif char in "}]":
+                self._depth -= 1
+                if self._element is not None and self._depth == 2:
+                    self._report("".join(self._element))
+                    self._element = None
+                    if self._broken:
+                        return
+                elif self._depth == 1:
+                    self._in_findings = False
+    
+    def finish(self, findings: List[Dict[str, Any]]):
+        """Report the findings of the complete response not yet reported"""
+        for finding in findings[self.reported:]:
+            self.on_finding(finding)
+        self.reported = max(self.reported, len(findings))
+    
+    def _report(self, element: str):
+        """Parse and report one streamed finding"""
+        try:
+            finding = json.loads(element)
+        except ValueError:
+            # Leave the rest to finish(), which has the parsed response
+            self._broken = True
+            return
+        self.reported += 1
+        self.on_finding(finding)
+
+
 class LLMProvider(ABC):
     """
     Abstract base class for all LLM providers.
@@ -152,6 +287,13 @@ class LLMProvider(ABC):
         self.model = model
         self.config = config
         self.provider_type = self._get_provider_type()
+        
+        # In-flight API requests of this provider, shared by every caller
+        # (detectors, batch helpers); adapts to the provider's rate limits
+        self.limiter = AdaptiveLimiter(
+            permits=config.get('max_concurrent_requests', 8),
+            max_permits=config.get('max_inflight_requests', 32)
+        )
     
     @abstractmethod
     def _get_provider_type(self) -> ProviderType:
@@ -275,6 +417,151 @@ class LLMProvider(ABC):
         """
         pass
     
+    async def _gather_each(self, operation: str, calls: List[Awaitable[Any]]) -> List[Optional[Any]]:
+        """
+        Run independent provider calls concurrently
+        
+        The API requests they make are bounded by the shared self.limiter.
+        Failed calls are logged.
+        
+        Args:
+            operation: Operation name for logging
+            calls: Awaitables to run
+            
+        Returns:
+            One result per call, in submission order; None for failed calls
+        """
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        
+        for index, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"{self.provider_type.value} {operation} failed: {str(result)}")
+                results[index] = None
+        
+        return results
+    
+    async def analyze_code_many(
+        self,
+        items: List[Tuple[str, Dict[str, Any], AnalysisType]]
+    ) -> List[Optional[AnalysisResult]]:
+        """
+        Analyze many code snippets concurrently
+        
+        Args:
+            items: (code, context, analysis_type) tuples
+            
+        Returns:
+            AnalysisResult per snippet, None where the analysis failed
+        """
+        return await self._gather_each(
+            'analyze_code',
+            [self.analyze_code(code, context, analysis_type) for code, context, analysis_type in items]
+        )
+    
+    async def generate_remediation_many(
+        self,
+        vulnerabilities: List[Dict[str, Any]]
+    ) -> List[Optional[RemediationPatch]]:
+        """
+        Generate remediation patches for many vulnerabilities concurrently
+        
+        Args:
+            vulnerabilities: Vulnerability details
+            
+        Returns:
+            RemediationPatch per vulnerability, None where it failed
+        """
+        return await self._gather_each(
+            'generate_remediation',
+            [self.generate_remediation(vuln) for vuln in vulnerabilities]
+        )
+    
+    async def calculate_cvss_many(
+        self,
+        vulnerabilities: List[Dict[str, Any]]
+    ) -> List[Optional[CVSSScore]]:
+        """
+        Calculate CVSS scores for many vulnerabilities concurrently
+        
+        Args:
+            vulnerabilities: Vulnerability details
+            
+        Returns:
+            CVSSScore per vulnerability, None where it failed
+        """
+        return await self._gather_each(
+            'calculate_cvss',
+            [self.calculate_cvss(vuln) for vuln in vulnerabilities]
+        )
+    
+    async def trace_data_flow_batched(
+        self,
+        entries: List[Dict[str, Any]],
+        entry_points: List[str],
+        dangerous_sinks: List[str],
+        context: Dict[str, Any]
+    ) -> Dict[str, AnalysisResult]:
+        """
+        Trace data flow in several files
+        
+        Providers with an id-tagged batch prompt override this to send all
+        files in one request; the default runs one trace_data_flow call per
+        file concurrently.
+        
+        Args:
+            entries: One dict per file with "id" (file path), "code" and
+                     optional per-file context such as "language"
+            entry_points: List of user input entry points
+            dangerous_sinks: List of dangerous operations to check
+            context: Context shared by all files (vulnerability type, ...)
+            
+        Returns:
+            AnalysisResult per entry id
+        """
+        results = await asyncio.gather(*(
+            self.trace_data_flow(
+                source_code=entry["code"],
+                entry_points=entry_points,
+                dangerous_sinks=dangerous_sinks,
+                context={
+                    **context,
+                    **{key: value for key, value in entry.items() if key not in ("id", "code")},
+                    "file_path": entry["id"]
+                }
+            )
+            for entry in entries
+        ))
+        return {entry["id"]: result for entry, result in zip(entries, results)}
+    
+    async def trace_data_flow_stream(
+        self,
+        source_code: str,
+        entry_points: List[str],
+        dangerous_sinks: List[str],
+        context: Dict[str, Any],
+        on_finding: Callable[[Dict[str, Any]], None]
+    ) -> AnalysisResult:
+        """
+        Trace data flow, reporting each finding as soon as it is available
+        
+        Providers that stream their output override this to report findings
+        while the response is still being generated; the default reports
+        them once trace_data_flow returns.
+        
+        Args:
+            source_code: Source code to analyze
+            entry_points: List of user input entry points
+            dangerous_sinks: List of dangerous operations to check
+            context: Additional context
+            on_finding: Called with each finding dict of the result, in order
+            
+        Returns:
+            The complete AnalysisResult
+        """
+        result = await self.trace_data_flow(source_code, entry_points, dangerous_sinks, context)
+        FindingsStream(on_finding).finish(result.findings)
+        return result
+    
     def get_provider_info(self) -> Dict[str, Any]:
         """
         Get provider information
@@ -6,9 +6,13 @@ Claude 3 based security analysis provider
 
 import json
 import time
-from typing import Dict, List, Any
+from typing import Dict, List, Any, TYPE_CHECKING
 from datetime import datetime
-from anthropic import AsyncAnthropic, APIError, RateLimitError, AuthenticationError, APIConnectionError
+
+# anthropic is imported on first use, like the OpenAI SDK, so loading the
+# orchestrator doesn't pay for an SDK that may never be called
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
 
 from.base import (
     LLMProvider,
@@ -20,8 +24,10 @@ from.base import (
     ProviderUnavailableError,
     ProviderQuotaExceededError,
     ProviderAuthenticationError,
-    ProviderInvalidResponseError
+    ProviderInvalidResponseError,
+    vuln_type_instruction
 )
+from .rate_limit import parse_retry_after
 
 
 class ClaudeProvider(LLMProvider):
@@ -30,7 +36,10 @@ class ClaudeProvider(LLMProvider):
     def __init__(self, api_key: str, model: str = "claude-3-opus-20240229", config: Dict[str, Any] = None):
         config = config or {}
         super().__init__(api_key, model, config)
-        self.client = AsyncAnthropic(api_key=api_key)
+        
+        from anthropic import AsyncAnthropic
+        
+        self.client: "AsyncAnthropic" = AsyncAnthropic(api_key=api_key)
         self.max_tokens = config.get('max_tokens', 4096)
         self.temperature = config.get('temperature', 0.1)
     
@@ -39,32 +48,37 @@ class ClaudeProvider(LLMProvider):
     
     async def _call_api(self, system_prompt: str, user_prompt: str) -> tuple:
         """Make API call to Claude"""
-        start_time = time.time()
+        import anthropic
+        
+        start_time = time.perf_counter()
         
         try:
-            response = await self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
+            async with self.limiter:
+                response = await self.client.messages.create(
+                    model=self.model,
+                    max_tokens=self.max_tokens,
+                    temperature=self.temperature,
+                    system=system_prompt,
+                    messages=[
+                        {"role": "user", "content": user_prompt}
+                    ]
+                )
+            self.limiter.record_response()
             
-            processing_time = time.time() - start_time
+            processing_time = time.perf_counter() - start_time
             content = response.content[0].text
             tokens_used = response.usage.input_tokens + response.usage.output_tokens
             
             return content, tokens_used, processing_time
             
-        except AuthenticationError as e:
+        except anthropic.AuthenticationError as e:
             raise ProviderAuthenticationError(f"Claude authentication failed: {str(e)}")
-        except RateLimitError as e:
+        except anthropic.RateLimitError as e:
+            self.limiter.record_rate_limited(parse_retry_after(e.response.headers))
             raise ProviderQuotaExceededError(f"Claude rate limit exceeded: {str(e)}")
-        except APIConnectionError as e:
+        except anthropic.APIConnectionError as e:
             raise ProviderUnavailableError(f"Claude connection failed: {str(e)}")
-        except APIError as e:
+        except anthropic.APIError as e:
             raise ProviderInvalidResponseError(f"Claude API error: {str(e)}")
         except Exception as e:
             raise ProviderInvalidResponseError(f"Unexpected Claude error: {str(e)}")
@@ -177,6 +191,7 @@ Respond with ONLY this JSON structure:
     "reasoning": "Explanation of findings"
 }}
 """
+        user_prompt += vuln_type_instruction(context)
         
         content, tokens, proc_time = await self._call_api(system_prompt, user_prompt)
         content = self._clean_json_response(content)
@@ -20,7 +20,8 @@ from .base import (
     ProviderUnavailableError,
     ProviderQuotaExceededError,
     ProviderAuthenticationError,
-    ProviderInvalidResponseError
+    ProviderInvalidResponseError,
+    vuln_type_instruction
 )
 
 
@@ -55,17 +56,19 @@ class GeminiProvider(LLMProvider):
     
     async def _call_api(self, prompt: str) -> tuple:
         """Make API call to Gemini with NEW SDK"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             # NEW SDK: Use client.models.generate_content
-            response = await asyncio.to_thread(
-                self.client.models.generate_content,
-                model=self.model,
-                contents=prompt
-            )
+            async with self.limiter:
+                response = await asyncio.to_thread(
+                    self.client.models.generate_content,
+                    model=self.model,
+                    contents=prompt
+                )
+            self.limiter.record_response()
             
-            processing_time = time.time() - start_time
+            processing_time = time.perf_counter() - start_time
             
             if not response.text:
                 raise ProviderInvalidResponseError("Empty response from Gemini")
@@ -81,6 +84,7 @@ class GeminiProvider(LLMProvider):
             if "api key" in error_str or "authentication" in error_str:
                 raise ProviderAuthenticationError(f"Gemini authentication failed: {str(e)}")
             elif "quota" in error_str or "rate limit" in error_str:
+                self.limiter.record_rate_limited()
                 raise ProviderQuotaExceededError(f"Gemini quota exceeded: {str(e)}")
             elif "connection" in error_str or "network" in error_str:
                 raise ProviderUnavailableError(f"Gemini connection failed: {str(e)}")
@@ -201,6 +205,7 @@ Respond ONLY with valid JSON:
     "reasoning": "Explanation of findings"
 }}
 """
+        prompt += vuln_type_instruction(context)
         
         content, tokens, proc_time = await self._call_api(prompt)
         content = self._clean_json_response(content)
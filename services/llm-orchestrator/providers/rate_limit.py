@@ -0,0 +1,189 @@
+"""
+Adaptive Request Limiting
+
+Caps the requests a provider has in flight and adapts the cap to the
+provider's rate limits, so concurrent scans slow down before they run into
+429 responses instead of after.
+"""
+
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Deque, Mapping, Optional, Tuple
+
+# OpenAI-style rate limit headers
+REMAINING_HEADER = "x-ratelimit-remaining-requests"
+RESET_HEADER = "x-ratelimit-reset-requests"
+
+# Reset durations look like "20ms", "1s" or "6m0.5s"
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a reset duration ("1s", "6m0s", "20ms") or plain seconds"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_rate_limit_headers(headers: Optional[Mapping[str, str]]) -> Tuple[Optional[int], Optional[float]]:
+    """
+    Read the request budget from response headers
+    
+    Args:
+        headers: Response headers (case-insensitive mapping), if available
+    
+    Returns:
+        (requests remaining, seconds until the budget resets); either is
+        None when the provider does not report it
+    """
+    if not headers:
+        return None, None
+    
+    remaining = headers.get(REMAINING_HEADER)
+    try:
+        remaining = int(remaining) if remaining is not None else None
+    except ValueError:
+        remaining = None
+    
+    return remaining, parse_duration(headers.get(RESET_HEADER))
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Seconds to wait after a rate limit error, from retry-after or the reset header"""
+    if not headers:
+        return None
+    delay = parse_duration(headers.get("retry-after"))
+    return delay if delay is not None else parse_duration(headers.get(RESET_HEADER))
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that follows the provider's rate limits
+    
+    Used as an async context manager around each API request. After every
+    response, record_response() adjusts the limit: it is halved and new
+    requests pause until the reset when the reported budget runs low, and
+    it grows by one after a run of successful requests as large as the
+    limit (additive increase, multiplicative decrease). Providers without
+    rate limit headers rely on record_rate_limited() after a 429.
+    """
+    
+    def __init__(
+        self,
+        permits: int = 8,
+        max_permits: int = 32,
+        min_remaining: int = 5,
+        backoff: float = 1.0
+    ):
+        """
+        Initialize limiter
+        
+        Args:
+            permits: Requests allowed in flight at first
+            max_permits: Upper bound the limit grows to
+            min_remaining: Reported remaining requests below which the
+                           limit is cut before the provider starts refusing
+            backoff: Pause in seconds after a rate limit error that gives
+                     no retry-after
+        """
+        self.permits = max(1, min(permits, max_permits))
+        self.max_permits = max_permits
+        self.min_remaining = min_remaining
+        self.backoff = backoff
+        self._active = 0
+        self._successes = 0
+        self._resume_at = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+    
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+    
+    async def acquire(self):
+        """Wait for a free request slot, then for any rate limit pause"""
+        if self._active < self.permits and not self._waiters:
+            self._active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just before the cancellation
+                    self.release()
+                else:
+                    self._waiters.remove(waiter)
+                raise
+        
+        # Sit out a rate limit pause while holding the slot; another 429 can
+        # extend the pause during the wait
+        try:
+            while (delay := self._resume_at - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.release()
+            raise
+    
+    def release(self):
+        """Free a request slot"""
+        self._active -= 1
+        self._wake()
+    
+    def record_response(self, headers: Optional[Mapping[str, str]] = None):
+        """
+        Adjust the limit after a successful response
+        
+        Args:
+            headers: Response headers, if the provider exposes them
+        """
+        remaining, reset = parse_rate_limit_headers(headers)
+        if remaining is not None and remaining < self.min_remaining:
+            self._decrease(reset if reset is not None else self.backoff)
+            return
+        
+        self._successes += 1
+        if self._successes >= self.permits and self.permits < self.max_permits:
+            self.permits += 1
+            self._successes = 0
+            self._wake()
+    
+    def record_rate_limited(self, retry_after: Optional[float] = None):
+        """
+        Back off after the provider refused a request
+        
+        Args:
+            retry_after: Seconds the provider asked to wait, if given
+        """
+        self._decrease(retry_after if retry_after is not None else self.backoff)
+    
+    def _decrease(self, pause: float):
+        """Halve the limit once per pause and hold new requests until it ends"""
+        now = time.monotonic()
+        if self._resume_at <= now:
+            # Responses already in flight when the budget ran out report
+            # the same condition; only the first one cuts the limit
+            self.permits = max(1, self.permits // 2)
+        self._successes = 0
+        self._resume_at = max(self._resume_at, now + pause)
+    
+    def _wake(self):
+        """Hand free slots to queued requests"""
+        while self._waiters and self._active < self.permits:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._active += 1
+                waiter.set_result(None)
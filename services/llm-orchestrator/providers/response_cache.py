@@ -0,0 +1,126 @@
+"""
+LLM Response Cache
+
+Persistent, content-addressed cache of provider responses so identical
+requests (same model, messages and sampling settings) skip the API call.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+import orjson
+
+
+DEFAULT_TTL = 7 * 86400  # One week
+
+
+class ResponseCache:
+    """SQLite-backed cache of LLM responses keyed by request hash"""
+    
+    def __init__(self, db_path: Optional[str] = None, ttl: int = DEFAULT_TTL):
+        """
+        Initialize response cache
+        
+        Args:
+            db_path: Path to SQLite cache file
+                    Default: ~/.emyuel/llm_cache.db
+            ttl: Seconds before a cached response expires
+        """
+        if db_path is None:
+            db_path = Path.home() / ".emyuel" / "llm_cache.db"
+        
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        
+        # One connection per cache, used from worker threads (async callers
+        # go through asyncio.to_thread) one at a time. WAL lets readers in
+        # other processes proceed during a write, and makes commits cheap.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        
+        self._init_database()
+    
+    @contextmanager
+    def _get_connection(self):
+        """Context manager for the cache connection with automatic commit/rollback"""
+        with self._lock:
+            try:
+                yield self._conn
+                self._conn.commit()
+            except Exception as e:
+                self._conn.rollback()
+                raise e
+    
+    def _init_database(self):
+        """Create cache table if not exists"""
+        with self._get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    tokens_used INTEGER NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build a cache key from request parameters
+        
+        Args:
+            *parts: JSON-serializable request parameters (model, messages, ...)
+        
+        Returns:
+            128-bit BLAKE2b hex digest
+        """
+        return hashlib.blake2b(orjson.dumps(parts), digest_size=16).hexdigest()
+    
+    def get(self, key: str) -> Optional[Tuple[str, int]]:
+        """
+        Look up a cached response
+        
+        Returns:
+            (content, tokens_used) or None on miss/expiry
+        """
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT content, tokens_used, expires_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            
+            if row is None:
+                return None
+            
+            content, tokens_used, expires_at = row
+            if expires_at < time.time():
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            
+            return content, tokens_used
+    
+    def set(self, key: str, content: str, tokens_used: int):
+        """Store a response"""
+        with self._get_connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, content, tokens_used, expires_at) VALUES (?, ?, ?, ?)",
+                (key, content, tokens_used, time.time() + self.ttl)
+            )
+    
+    def clear(self):
+        """Remove all cached responses"""
+        with self._get_connection() as conn:
+            conn.execute("DELETE FROM responses")
+    
+    def close(self):
+        """Close the cache connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,127 @@
+"""
+Near-Duplicate Source Detection
+
+64-bit simhash fingerprints of source code and a BK-tree to find stored
+fingerprints within a small Hamming distance, so reformatted or lightly
+edited copies of a file can reuse earlier analysis results.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import Any, List, Optional
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Below this many tokens a single edit moves the fingerprint too far (or
+# not far enough) for the distance to mean anything
+MIN_TOKENS = 100
+
+
+def _hamming(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints"""
+    return bin(a ^ b).count("1")
+
+
+def simhash(source_code: str) -> Optional[int]:
+    """
+    Compute the 64-bit simhash of source code
+    
+    Identifier and literal tokens are weighted by frequency, so whitespace,
+    punctuation and token order changes do not affect the fingerprint.
+    
+    Args:
+        source_code: Source code
+    
+    Returns:
+        Fingerprint, or None for sources with fewer than MIN_TOKENS tokens
+    """
+    tokens = _TOKEN_RE.findall(source_code)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    
+    totals = [0] * 64
+    for token, weight in Counter(tokens).items():
+        token_hash = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+        for bit in range(64):
+            if token_hash >> bit & 1:
+                totals[bit] += weight
+            else:
+                totals[bit] -= weight
+    
+    fingerprint = 0
+    for bit, total in enumerate(totals):
+        if total > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class SimhashIndex:
+    """BK-tree of fingerprints supporting nearest-neighbour lookups"""
+    
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize index
+        
+        Args:
+            max_entries: Fingerprints kept; later additions are ignored
+        """
+        self.max_entries = max_entries
+        self._size = 0
+        # Node: [fingerprint, value, {distance: child node}]
+        self._root: Optional[List[Any]] = None
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def add(self, fingerprint: int, value: Any):
+        """Store a value under a fingerprint, replacing an identical fingerprint"""
+        if self._root is None:
+            self._root = [fingerprint, value, {}]
+            self._size = 1
+            return
+        
+        node = self._root
+        while True:
+            distance = _hamming(fingerprint, node[0])
+            if distance == 0:
+                node[1] = value
+                return
+            child = node[2].get(distance)
+            if child is None:
+                if self._size >= self.max_entries:
+                    return
+                node[2][distance] = [fingerprint, value, {}]
+                self._size += 1
+                return
+            node = child
+    
+    def find(self, fingerprint: int, max_distance: int) -> Optional[Any]:
+        """
+        Find the value of the closest stored fingerprint
+        
+        Args:
+            fingerprint: Fingerprint to look up
+            max_distance: Largest Hamming distance accepted
+        
+        Returns:
+            Value of the nearest fingerprint within max_distance, or None
+        """
+        best_value = None
+        best_distance = max_distance + 1
+        stack = [self._root] if self._root is not None else []
+        
+        while stack:
+            node = stack.pop()
+            distance = _hamming(fingerprint, node[0])
+            if distance < best_distance:
+                best_value, best_distance = node[1], distance
+                if distance == 0:
+                    break
+            
+            # Triangle inequality: only children in this band can be closer
+            for child_distance, child in node[2].items():
+                if abs(child_distance - distance) < best_distance:
+                    stack.append(child)
+        
+        return best_value
@@ -4,9 +4,14 @@ API Key Manager Helper - Simplified version for scanner
 Manages API keys for LLM providers
 """
 
+import mmap
+import os
 from pathlib import Path
-import json
-from typing import Optional, Dict, Any
+import orjson
+from typing import Optional, Dict, Any, List
+
+
+MMAP_THRESHOLD = 16 * 1024  # Keyfiles smaller than this are read directly
 
 
 class APIKeyManager:
@@ -23,21 +28,59 @@ class APIKeyManager:
             config_path = Path.home() / ".emyuel" / "api_keys.json"
         
         self.config_path = Path(config_path)
+        self._mtime = None
         self.keys = self._load_keys()
+        self._primary = self._build_primary()
     
     def _load_keys(self) -> Dict[str, Any]:
         """Load API keys from config file"""
         if not self.config_path.exists():
+            self._mtime = None
             return {}
         
         try:
-            with open(self.config_path, 'r') as f:
-                data = json.load(f)
-                return data
+            stat = self.config_path.stat()
+            self._mtime = stat.st_mtime_ns
+            
+            if stat.st_size < MMAP_THRESHOLD:
+                return orjson.loads(self.config_path.read_bytes())
+            
+            # Large keyfiles: parse straight from the page cache
+            with open(self.config_path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                    memoryview(mm) as view:
+                return orjson.loads(view)
         except Exception as e:
             print(f"[API Keys] Error loading keys: {e}")
             return {}
     
+    @staticmethod
+    def _select_primary(provider_keys: List[Dict[str, Any]]) -> Optional[str]:
+        """Pick the first non-backup key, or the first key if all are backups"""
+        for key_info in provider_keys:
+            if not key_info.get('is_backup', False):
+                return key_info.get('key')
+        
+        return provider_keys[0].get('key') if provider_keys else None
+    
+    def _build_primary(self) -> Dict[str, Optional[str]]:
+        """Precompute the primary key for every provider"""
+        return {
+            provider: self._select_primary(provider_keys)
+            for provider, provider_keys in self.keys.items()
+        }
+    
+    def _reload_if_changed(self):
+        """Reload keys if the config file was modified by another process"""
+        try:
+            mtime = os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        
+        if mtime != self._mtime:
+            self.keys = self._load_keys()
+            self._primary = self._build_primary()
+    
     def get_key(self, provider: str) -> Optional[str]:
         """
         Get API key for provider
@@ -48,18 +91,8 @@ class APIKeyManager:
         Returns:
             API key or None
         """
-        provider_keys = self.keys.get(provider, [])
-        
-        if not provider_keys:
-            return None
-        
-        # Return first non-backup key
-        for key_info in provider_keys:
-            if not key_info.get('is_backup', False):
-                return key_info.get('key')
-        
-        # If no non-backup key, return first key
-        return provider_keys[0].get('key') if provider_keys else None
+        self._reload_if_changed()
+        return self._primary.get(provider)
     
     def set_key(self, provider: str, key: str):
         """
@@ -77,6 +110,7 @@ class APIKeyManager:
             'key': key,
             'is_backup': False
         })
+        self._primary[provider] = self._select_primary(self.keys[provider])
         
         self._save_keys()
     
@@ -88,5 +122,12 @@ class APIKeyManager:
         """Save keys to config file"""
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(self.config_path, 'w') as f:
-            json.dump(self.keys, f, indent=2)
+        # Write to a temp file and rename so a crash never leaves a
+        # half-written keyfile behind
+        tmp_path = self.config_path.with_suffix('.json.tmp')
+        tmp_path.write_bytes(orjson.dumps(self.keys, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_path, self.config_path)
+        
+        # Callers may edit self.keys directly before saving
+        self._primary = self._build_primary()
+        self._mtime = self.config_path.stat().st_mtime_ns
@@ -5,23 +5,394 @@ Handles file traversal, code parsing, and static analysis
 """
 
 import asyncio
+import logging
+import mmap
+import os
 import re
+import threading
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Set
+from typing import Dict, List, Any, Optional, Set, Tuple
 import ast
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+logger = logging.getLogger(__name__)
+
+
+# Supported source extensions and the language each maps to
+_LANG_MAP = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.jsx': 'javascript',
+    '.tsx': 'typescript',
+    '.java': 'java',
+    '.php': 'php',
+    '.rb': 'ruby',
+    '.go': 'go',
+    '.cs': 'csharp',
+    '.cpp': 'cpp',
+    '.c': 'c',
+    '.html': 'html',
+    '.vue': 'vue'
+}
+
+_SOURCE_EXTS = frozenset(_LANG_MAP)
+
+# Directories to exclude
+_EXCLUDE_DIRS = frozenset({'node_modules', '.git', '__pycache__', 'venv', 'env', 'dist', 'build', '.next', 'target'})
+
+# Files at or above this size are only scanned statically, not sent to the LLM
+LLM_MAX_CHARS = 10000
+
+# Limits for grouping small files into one LLM request; the character
+# budget keeps the prompt around 6k tokens
+LLM_BATCH_FILES = 8
+LLM_BATCH_CHARS = 24000
+
+# Finding type each scan module produces in static analysis
+_MODULE_FINDING_TYPES = {
+    'secrets': 'hardcoded_secret',
+    'sqli': 'sqli',
+    'xss': 'xss',
+    'rce': 'rce',
+    'path_traversal': 'path_traversal',
+    'crypto': 'weak_crypto'
+}
+
+# Modules the static checks can confirm in each language; a file's LLM
+# review is skipped once these are confirmed for every requested module
+# that has them (see CodeScanner._static_covers)
+_STATIC_MODULES = {
+    'python': frozenset({'secrets', 'sqli', 'rce', 'path_traversal', 'crypto'}),
+    'javascript': frozenset({'secrets', 'xss', 'sqli', 'rce'}),
+    'typescript': frozenset({'secrets', 'xss', 'sqli', 'rce'})
+}
+
+# Static findings at or above this confidence count as confirmed; finding
+# types whose patterns never reach it count at their own highest confidence
+COVERED_CONFIDENCE = 0.8
+_COVERED_CONFIDENCE_BY_TYPE = {
+    'path_traversal': 0.7
+}
+
+# Files at or above this size are memory-mapped instead of read into memory;
+# well above anything that can decode to LLM_MAX_CHARS (<= 4 bytes per char)
+MMAP_THRESHOLD = 64 * 1024
+
+# Patterns are all ASCII and run over raw file bytes, so files are never
+# fully decoded. They run over whole files rather than line by line, so
+# whitespace classes exclude newlines to keep every match on a single line.
+
+# Source and flags of every pattern built by _compile, for engines that
+# compile their own copy (hyperscan)
+_PATTERN_SOURCES: Dict[Any, Tuple[bytes, int]] = {}
+
+
+def _compile(pattern: bytes, flags: int = 0):
+    """
+    Compile a scan pattern with RE2 when available, else the re module
+    
+    RE2 runs in linear time with no backtracking, which matters for the
+    .*-heavy alternations on large files. Patterns RE2 rejects use re.
+    """
+    compiled = None
+    if re2 is not None:
+        try:
+            compiled = re2.compile(b'(?i)' + pattern if flags & re.IGNORECASE else pattern)
+        except Exception:
+            compiled = None
+    if compiled is None:
+        compiled = re.compile(pattern, flags)
+    
+    _PATTERN_SOURCES[compiled] = (pattern, flags)
+    return compiled
+
+
+# Patterns for common secrets
+_SECRET_PATTERNS = {
+    'aws_key': r'AKIA[0-9A-Z]{16}',
+    'generic_api_key': r'["\']?api[_-]?key["\']?[^\S\n]*[:=][^\S\n]*["\']([a-zA-Z0-9_\-]{20,})["\']',
+    'generic_secret': r'["\']?secret["\']?[^\S\n]*[:=][^\S\n]*["\']([a-zA-Z0-9_\-]{16,})["\']',
+    'password': r'["\']?password["\']?[^\S\n]*[:=][^\S\n]*["\']([^"\'\n]{6,})["\']',
+    'private_key': r'-----BEGIN (RSA |EC |DSA )?PRIVATE KEY-----',
+    'github_token': r'ghp_[a-zA-Z0-9]{36}',
+    'google_api': r'AIza[0-9A-Za-z\\-_]{35}',
+    'slack_token': r'xox[baprs]-[0-9a-zA-Z]{10,48}',
+}
+
+# All secret patterns fused into one alternation, to find the lines holding
+# any secret in one pass
+_SECRET_RE = _compile('|'.join(
+    f'(?P<{name}>{pattern})' for name, pattern in _SECRET_PATTERNS.items()
+).encode(), re.IGNORECASE)
+
+# Each kind's own pattern, run on the lines _SECRET_RE matched; a match of
+# one kind can contain another (an AWS key assigned to api_key), which the
+# alternation alone would not report
+_SECRET_KIND_RES = [
+    (_compile(pattern.encode(), re.IGNORECASE), f'Hardcoded {name} detected')
+    for name, pattern in _SECRET_PATTERNS.items()
+]
+
+
+# Literals that every secret pattern contains (case-insensitively); lines
+# without any of them are never handed to _SECRET_RE
+_SECRET_ANCHORS = ('akia', 'ghp_', 'aiza', 'xox', '-----begin', 'api', 'secret', 'password')
+
+if ahocorasick is not None:
+    _SECRET_AUTOMATON = ahocorasick.Automaton()
+    for _anchor in _SECRET_ANCHORS:
+        _SECRET_AUTOMATON.add_word(_anchor, _anchor)
+    _SECRET_AUTOMATON.make_automaton()
+else:
+    _SECRET_AUTOMATON = None
+    _SECRET_ANCHOR_RE = re.compile('|'.join(re.escape(anchor) for anchor in _SECRET_ANCHORS).encode())
+
+# Markers (matched against lowercased text) of example values rather than real secrets
+_PLACEHOLDER_RE = re.compile(rb'example|placeholder|your_|xxx|\.\.\.|todo')
+
+# Hints that user input reaches a dangerous call on the same line
+_PY_USER_INPUT_RE = re.compile(rb'request|input|argv|get|post')
+_JS_XSS_INPUT_RE = re.compile(rb'req\.|params|query|body|input')
+_JS_RCE_INPUT_RE = re.compile(rb'req\.|params|query|body')
+
+
+def _fuse(patterns: List[str], flags: int = 0):
+    """Compile a list of patterns into a single byte-pattern alternation"""
+    return _compile('|'.join(f'(?:{pattern})' for pattern in patterns).encode(), flags)
+
+
+# Python vulnerability patterns
+_PY_SQLI_RE = _fuse([
+    r'execute[^\S\n]*\([^\S\n]*["\'].*%s.*["\']',  # String formatting in SQL
+    r'execute[^\S\n]*\([^\S\n]*.*\+.*\)',  # String concatenation in SQL
+    r'cursor\.execute[^\S\n]*\([^\S\n]*f["\']',  # f-strings in SQL
+])
+
+_PY_RCE_RE = _fuse([
+    r'os\.system[^\S\n]*\(',
+    r'subprocess\.call[^\S\n]*\(',
+    r'eval[^\S\n]*\(',
+    r'exec[^\S\n]*\(',
+])
+
+_PY_PATH_RE = _fuse([
+    r'open[^\S\n]*\([^\S\n]*.*request',
+    r'Path[^\S\n]*\([^\S\n]*.*request',
+    r'file[^\S\n]*=[^\S\n]*.*request',
+], re.IGNORECASE)
+
+_PY_CRYPTO_RE = _fuse([
+    r'hashlib\.md5[^\S\n]*\(',
+    r'hashlib\.sha1[^\S\n]*\(',
+    r'DES\.',
+    r'mode[^\S\n]*=[^\S\n]*ECB',
+])
+
+# JavaScript/TypeScript vulnerability patterns
+_JS_XSS_RE = _fuse([
+    r'innerHTML[^\S\n]*=',
+    r'dangerouslySetInnerHTML',
+    r'document\.write[^\S\n]*\(',
+    r'\.html[^\S\n]*\(',  # jQuery .html()
+])
+
+_JS_SQLI_RE = _fuse([
+    r'query[^\S\n]*\([^\S\n]*["`\'].*\$\{',  # Template literals in SQL
+    r'query[^\S\n]*\([^\S\n]*.*\+.*\)',  # String concatenation in SQL
+])
+
+_JS_RCE_RE = _fuse([
+    r'exec[^\S\n]*\(',
+    r'spawn[^\S\n]*\(',
+    r'execSync[^\S\n]*\(',
+])
+
+
+# Every fused pattern, in hyperscan database id order
+_HS_PATTERNS = [
+    _SECRET_RE,
+    _PY_SQLI_RE, _PY_RCE_RE, _PY_PATH_RE, _PY_CRYPTO_RE,
+    _JS_XSS_RE, _JS_SQLI_RE, _JS_RCE_RE,
+]
+
+_NAMED_GROUP_RE = re.compile(rb'\(\?P<\w+>')
+
+# Hyperscan scratch space must not be shared between threads, so each
+# thread compiles its own database on first use
+_hs_local = threading.local()
+_hs_disabled = hyperscan is None
+
+
+def _hyperscan_database():
+    """Return this thread's hyperscan database of _HS_PATTERNS, or None if unavailable"""
+    global _hs_disabled
+    if _hs_disabled:
+        return None
+    
+    database = getattr(_hs_local, 'database', None)
+    if database is None:
+        database = hyperscan.Database()
+        try:
+            database.compile(
+                expressions=[_NAMED_GROUP_RE.sub(b'(?:', _PATTERN_SOURCES[pattern][0]) for pattern in _HS_PATTERNS],
+                ids=list(range(len(_HS_PATTERNS))),
+                elements=len(_HS_PATTERNS),
+                flags=[
+                    hyperscan.HS_FLAG_CASELESS if _PATTERN_SOURCES[pattern][1] & re.IGNORECASE else 0
+                    for pattern in _HS_PATTERNS
+                ],
+            )
+        except hyperscan.error as e:
+            # Fall back to the re engine for every pattern
+            logger.warning("Hyperscan unavailable, using re: %s", e)
+            _hs_disabled = True
+            return None
+        _hs_local.database = database
+    return database
+
+
+def _hyperscan_line_hits(content: bytes, line_starts: List[int]) -> Optional[Dict[re.Pattern, List[int]]]:
+    """
+    Scan content once for all fused patterns with hyperscan
+    
+    Returns:
+        Ascending line numbers with a match, per pattern, or None when
+        hyperscan is not available
+    """
+    database = _hyperscan_database()
+    if database is None:
+        return None
+    
+    hits = [set() for _ in _HS_PATTERNS]
+    
+    def on_match(pattern_id, start, end, flags, context):
+        hits[pattern_id].add(bisect_right(line_starts, end - 1))
+    
+    # The hyperscan bindings take bytes, not arbitrary buffers such as mmap
+    data = content if isinstance(content, bytes) else bytes(content)
+    database.scan(data, match_event_handler=on_match)
+    return {pattern: sorted(lines) for pattern, lines in zip(_HS_PATTERNS, hits)}
+
+
+def _line_index(content: bytes) -> List[int]:
+    """Return the offset at which each line of content starts"""
+    line_starts = [0]
+    pos = content.find(b'\n')
+    while pos != -1:
+        line_starts.append(pos + 1)
+        pos = content.find(b'\n', pos + 1)
+    return line_starts
+
+
+def _line_text(content: bytes, line_starts: List[int], line_num: int) -> bytes:
+    """Return the raw bytes of a 1-based line, without its newline"""
+    start = line_starts[line_num - 1]
+    end = line_starts[line_num] - 1 if line_num < len(line_starts) else len(content)
+    return content[start:end]
+
+
+def _locate(content: bytes, line_starts: List[int], offset: int) -> Tuple[int, bytes]:
+    """Return (1-based line number, line bytes) containing offset"""
+    line_num = bisect_right(line_starts, offset)
+    return line_num, _line_text(content, line_starts, line_num)
+
+
+def _decode_line(line: bytes) -> str:
+    """Decode a line of source for reporting"""
+    return line.decode('utf-8', errors='ignore').strip()
+
+
+def _decode_evidence(line: bytes, limit: int = 100) -> str:
+    """
+    Decode the first `limit` characters of a line for reporting
+    
+    Same result as _decode_line(line)[:limit], but long lines (minified
+    bundles) only have their head decoded rather than the whole line.
+    """
+    head_size = limit * 8
+    if len(line) > head_size:
+        text = line[:head_size].decode('utf-8', errors='ignore').lstrip()
+        # Text past the limit means trailing whitespace cannot shorten it
+        if text[limit:].strip():
+            return text[:limit]
+    return _decode_line(line)[:limit]
+
+
+def _secret_candidate_lines(content_lower: bytes, line_starts: List[int]) -> List[int]:
+    """Return line numbers, ascending, that contain a secret anchor literal"""
+    if _SECRET_AUTOMATON is not None:
+        # The automaton works on str; latin-1 maps bytes to chars one to one
+        offsets = (end for end, _ in _SECRET_AUTOMATON.iter(content_lower.decode('latin-1')))
+    else:
+        offsets = (match.start() for match in _SECRET_ANCHOR_RE.finditer(content_lower))
+    
+    candidates = []
+    for offset in offsets:
+        line_num = bisect_right(line_starts, offset)
+        if not candidates or candidates[-1] != line_num:
+            candidates.append(line_num)
+    return candidates
+
+
+@dataclass(slots=True)
+class Finding:
+    """A static analysis finding; scan_directory returns them as dicts"""
+    type: str
+    severity: str
+    file: str
+    line: int
+    description: str
+    evidence: str
+    remediation: str
+    source: str
+    confidence: float
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the finding dict reported by the scanner"""
+        return {
+            "type": self.type,
+            "severity": self.severity,
+            "file": self.file,
+            "line": self.line,
+            "description": self.description,
+            "evidence": self.evidence,
+            "remediation": self.remediation,
+            "source": self.source,
+            "confidence": self.confidence
+        }
+
 
 class CodeScanner:
     """Scanner for source code directories"""
     
-    def __init__(self, llm_analyzer):
+    def __init__(self, llm_analyzer, max_concurrent_files: int = 16):
         """
         Initialize code scanner
         
         Args:
             llm_analyzer: LLM analyzer instance
+            max_concurrent_files: Maximum number of files scanned at once
         """
         self.llm = llm_analyzer
+        self.max_concurrent_files = max_concurrent_files
     
     async def scan_directory(self, directory: str, modules: List[str] = None) -> List[Dict[str, Any]]:
         """
@@ -37,327 +408,412 @@ class CodeScanner:
         if modules is None or 'all' in modules:
             modules = ['secrets', 'sqli', 'xss', 'rce', 'path_traversal', 'crypto']
         
-        all_findings = []
-        
         # Find all source files
-        print(f"[Code] Scanning directory: {directory}")
+        logger.info("Scanning directory: %s", directory)
         files = self._find_source_files(directory)
-        print(f"[Code] Found {len(files)} files to analyze")
+        logger.info("Found %d files to analyze", len(files))
+        
+        if not files:
+            logger.info("Scan complete: 0 vulnerabilities found")
+            return []
+        
+        semaphore = asyncio.Semaphore(self.max_concurrent_files)
+        llm_semaphore = asyncio.Semaphore(self.max_concurrent_files)
+        
+        static_findings: List[List[Finding]] = [[] for _ in files]
+        llm_findings: Dict[str, List[Dict[str, Any]]] = {}
+        llm_tasks = []
+        batch: List[Tuple[str, str, str]] = []
+        batch_chars = 0
         
-        # Scan each file
-        for i, file_path in enumerate(files):
-            print(f"[Code] Analyzing file {i+1}/{len(files)}: {file_path.name}")
+        async def analyze_batch(items: List[Tuple[str, str, str]]):
+            async with llm_semaphore:
+                llm_findings.update(await self.llm.analyze_code_batch(items))
+        
+        def flush_batch():
+            nonlocal batch, batch_chars
+            if batch:
+                llm_tasks.append(asyncio.ensure_future(analyze_batch(batch)))
+                batch, batch_chars = [], 0
+        
+        # Static analysis is CPU-bound regex work; worker processes spread it
+        # across cores while LLM calls stay on this event loop
+        with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(files))) as executor:
+            async def scan_one(index: int, file_path: str):
+                async with semaphore:
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Analyzing file %d/%d: %s", index + 1, len(files), os.path.basename(file_path))
+                    return index, await self._scan_file(file_path, modules, executor)
+            
+            # Small files are grouped into batched LLM requests as their static
+            # scans finish, so request latency is paid once per batch
+            for next_result in asyncio.as_completed([scan_one(i, file_path) for i, file_path in enumerate(files)]):
+                index, (findings, llm_item) = await next_result
+                static_findings[index] = findings
+                
+                if llm_item is not None:
+                    if batch and (len(batch) >= LLM_BATCH_FILES or batch_chars + len(llm_item[1]) > LLM_BATCH_CHARS):
+                        flush_batch()
+                    batch.append(llm_item)
+                    batch_chars += len(llm_item[1])
             
-            file_findings = await self._scan_file(file_path, modules)
-            all_findings.extend(file_findings)
+            flush_batch()
+            await asyncio.gather(*llm_tasks)
         
-        print(f"[Code] Scan complete: {len(all_findings)} vulnerabilities found")
+        # Report in file order: static findings, then LLM findings per file.
+        # Static findings stay compact Finding objects until this point
+        all_findings = []
+        for file_path, findings in zip(files, static_findings):
+            all_findings.extend([finding.to_dict() for finding in findings])
+            all_findings.extend(llm_findings.get(file_path, []))
+        
+        logger.info("Scan complete: %d vulnerabilities found", len(all_findings))
         return all_findings
     
-    def _find_source_files(self, directory: str) -> List[Path]:
+    def _find_source_files(self, directory: str) -> List[str]:
         """Find all source code files in directory"""
-        path = Path(directory)
-        
-        # Supported file extensions
-        extensions = {'.py', '.js', '.ts', '.java', '.php', '.rb', '.go', '.cs', '.cpp', '.c', '.html', '.jsx', '.tsx', '.vue'}
+        files = []
         
-        # Directories to exclude
-        exclude_dirs = {'node_modules', '.git', '__pycache__', 'venv', 'env', 'dist', 'build', '.next', 'target'}
+        # Walk with os.scandir so excluded trees are pruned before they are
+        # descended into; DirEntry caches the type, saving a stat per entry
+        pending = [directory]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in _EXCLUDE_DIRS:
+                                pending.append(entry.path)
+                        elif os.path.splitext(entry.name)[1] in _SOURCE_EXTS:
+                            files.append(entry.path)
+            except OSError as e:
+                logger.warning("Cannot list %s: %s", e.filename, e.strerror)
         
-        files = []
+        return files
+    
+    async def _scan_file(
+        self,
+        file_path: str,
+        modules: List[str],
+        executor: Optional[ProcessPoolExecutor] = None
+    ) -> Tuple[List[Finding], Optional[Tuple[str, str, str]]]:
+        """
+        Statically scan individual file for vulnerabilities
         
-        for file_path in path.rglob('*'):
-            # Skip directories
-            if file_path.is_dir():
-                continue
-            
-            # Skip excluded directories
-            if any(excluded in file_path.parts for excluded in exclude_dirs):
-                continue
+        Args:
+            file_path: File to scan
+            modules: Vulnerability modules to check
+            executor: Process pool for the static checks (default thread pool if None)
             
-            # Check extension
-            if file_path.suffix in extensions:
-                files.append(file_path)
+        Returns:
+            (findings, llm_item) - llm_item is the (file_path, content, language)
+            to queue for LLM analysis, or None if the file does not need it
+        """
+        # Detect language
+        language = self._detect_language(os.path.splitext(file_path)[1])
         
-        return files
+        # 1-2. Static analysis; the worker reads the file itself so only
+        # findings (and small files' content) cross the process boundary
+        loop = asyncio.get_running_loop()
+        findings, content = await loop.run_in_executor(
+            executor, _static_scan_file, file_path, language, modules
+        )
+        
+        # 3. LLM analysis (for deeper inspection), batched by scan_directory
+        # Only analyze files that are not too large, and only when static
+        # analysis has not already confirmed every requested module
+        if content is not None and not self._static_covers(findings, modules, language):
+            return findings, (file_path, content, language)
+        
+        return findings, None
     
-    async def _scan_file(self, file_path: Path, modules: List[str]) -> List[Dict[str, Any]]:
-        """Scan individual file for vulnerabilities"""
+    def _static_scan(self, content: bytes, file_path: str, language: str, modules: List[str]) -> List[Finding]:
+        """Run secret detection and language pattern checks on raw file content"""
         findings = []
         
-        try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-        except Exception as e:
-            print(f"[Code] Error reading {file_path}: {e}")
-            return findings
-        
-        # Skip empty or very short files
-        if len(content.strip()) < 20:
-            return findings
+        # Line offsets shared by the static scanners to resolve match positions
+        line_starts = _line_index(content)
         
-        # Detect language
-        language = self._detect_language(file_path.suffix)
+        # With hyperscan, one pass finds the matching lines of every pattern
+        line_hits = _hyperscan_line_hits(content, line_starts)
         
         # 1. Check for hardcoded secrets
         if 'secrets' in modules:
-            secret_findings = self._find_hardcoded_secrets(content, str(file_path))
+            secret_findings = self._find_hardcoded_secrets(content, file_path, line_starts, line_hits)
             findings.extend(secret_findings)
         
         # 2. Static pattern matching for common vulnerabilities
         if language == 'python':
-            pattern_findings = self._scan_python_patterns(content, str(file_path), modules)
+            pattern_findings = self._scan_python_patterns(content, file_path, modules, line_starts, line_hits)
             findings.extend(pattern_findings)
         elif language in ['javascript', 'typescript']:
-            pattern_findings = self._scan_javascript_patterns(content, str(file_path), modules)
+            pattern_findings = self._scan_javascript_patterns(content, file_path, modules, line_starts, line_hits)
             findings.extend(pattern_findings)
         
-        # 3. LLM analysis (for deeper inspection)
-        # Only analyze files that are not too large
-        if len(content) < 10000:
-            llm_findings = await self.llm.analyze_code(content, str(file_path), language)
-            findings.extend(llm_findings)
-        
         return findings
     
+    def _static_covers(self, findings: List[Finding], modules: List[str], language: str) -> bool:
+        """
+        Check whether high-confidence static findings cover the requested modules
+        
+        Only modules with static patterns for the file's language are
+        compared; with none of those requested, the LLM review always runs.
+        """
+        checkable = [module for module in modules if module in _STATIC_MODULES.get(language, ())]
+        if not checkable:
+            return False
+        
+        covered = {
+            finding.type for finding in findings
+            if finding.confidence >= _COVERED_CONFIDENCE_BY_TYPE.get(finding.type, COVERED_CONFIDENCE)
+        }
+        return all(_MODULE_FINDING_TYPES[module] in covered for module in checkable)
+    
     def _detect_language(self, extension: str) -> str:
         """Detect programming language from extension"""
-        lang_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.ts': 'typescript',
-            '.jsx': 'javascript',
-            '.tsx': 'typescript',
-            '.java': 'java',
-            '.php': 'php',
-            '.rb': 'ruby',
-            '.go': 'go',
-            '.cs': 'csharp',
-            '.cpp': 'cpp',
-            '.c': 'c',
-            '.html': 'html',
-            '.vue': 'vue'
-        }
-        return lang_map.get(extension, 'unknown')
+        return _LANG_MAP.get(extension, 'unknown')
     
-    def _find_hardcoded_secrets(self, content: str, file_path: str) -> List[Dict[str, Any]]:
+    def _find_hardcoded_secrets(
+        self,
+        content: bytes,
+        file_path: str,
+        line_starts: Optional[List[int]] = None,
+        line_hits: Optional[Dict[re.Pattern, List[int]]] = None
+    ) -> List[Finding]:
         """Find hardcoded API keys, passwords, tokens"""
         findings = []
         
-        # Patterns for common secrets
-        secret_patterns = {
-            'aws_key': r'AKIA[0-9A-Z]{16}',
-            'generic_api_key': r'["\']?api[_-]?key["\']?\s*[:=]\s*["\']([a-zA-Z0-9_\-]{20,})["\']',
-            'generic_secret': r'["\']?secret["\']?\s*[:=]\s*["\']([a-zA-Z0-9_\-]{16,})["\']',
-            'password': r'["\']?password["\']?\s*[:=]\s*["\']([^"\']{6,})["\']',
-            'private_key': r'-----BEGIN (RSA |EC |DSA )?PRIVATE KEY-----',
-            'github_token': r'ghp_[a-zA-Z0-9]{36}',
-            'google_api': r'AIza[0-9A-Za-z\\-_]{35}',
-            'slack_token': r'xox[baprs]-[0-9a-zA-Z]{10,48}',
-        }
+        if line_starts is None:
+            line_starts = _line_index(content)
         
-        lines = content.split('\n')
+        # Only lines holding an anchor literal (or already known to match)
+        # can match, so the full pattern is verified on those lines alone
+        if line_hits is not None:
+            candidate_lines = line_hits[_SECRET_RE]
+        else:
+            # bytes.lower() is ASCII-only, so offsets stay aligned with content
+            candidate_lines = _secret_candidate_lines(bytes(content).lower(), line_starts)
         
-        for pattern_name, pattern in secret_patterns.items():
-            for line_num, line in enumerate(lines, 1):
-                matches = re.finditer(pattern, line, re.IGNORECASE)
-                
-                for match in matches:
-                    # Skip if it looks like a placeholder or example
-                    if any(placeholder in line.lower() for placeholder in ['example', 'placeholder', 'your_', 'xxx', '...', 'todo']):
-                        continue
-                    
-                    findings.append({
-                        'type': 'hardcoded_secret',
-                        'severity': 'critical',
-                        'file': file_path,
-                        'line': line_num,
-                        'description': f'Hardcoded {pattern_name} detected',
-                        'evidence': line.strip()[:100],
-                        'remediation': 'Move secrets to environment variables or secure vault',
-                        'source': 'static',
-                        'confidence': 0.9
-                    })
+        for line_num in candidate_lines:
+            line = _line_text(content, line_starts, line_num)
+            if _SECRET_RE.search(line) is None:
+                continue
+            
+            # Skip if it looks like a placeholder or example
+            if _PLACEHOLDER_RE.search(line.lower()):
+                continue
+            
+            # Every match on the line shares the same evidence
+            evidence = _decode_evidence(line)
+            for pattern, description in _SECRET_KIND_RES:
+                for _ in pattern.finditer(line):
+                    findings.append(Finding(
+                        type='hardcoded_secret',
+                        severity='critical',
+                        file=file_path,
+                        line=line_num,
+                        description=description,
+                        evidence=evidence,
+                        remediation='Move secrets to environment variables or secure vault',
+                        source='static',
+                        confidence=0.9
+                    ))
         
         return findings
     
-    def _scan_python_patterns(self, content: str, file_path: str, modules: List[str]) -> List[Dict[str, Any]]:
+    def _matching_lines(
+        self,
+        pattern: re.Pattern,
+        content: str,
+        line_starts: List[int],
+        line_hits: Optional[Dict[re.Pattern, List[int]]] = None
+    ):
+        """Yield (line number, line text) for each line containing a match"""
+        if line_hits is not None:
+            for line_num in line_hits[pattern]:
+                yield line_num, _line_text(content, line_starts, line_num)
+            return
+        
+        last_line = 0
+        for match in pattern.finditer(content):
+            line_num, line = _locate(content, line_starts, match.start())
+            if line_num != last_line:
+                last_line = line_num
+                yield line_num, line
+    
+    def _scan_python_patterns(
+        self,
+        content: bytes,
+        file_path: str,
+        modules: List[str],
+        line_starts: Optional[List[int]] = None,
+        line_hits: Optional[Dict[re.Pattern, List[int]]] = None
+    ) -> List[Finding]:
         """Scan Python code for vulnerability patterns"""
         findings = []
-        lines = content.split('\n')
+        
+        if line_starts is None:
+            line_starts = _line_index(content)
         
         # SQL Injection patterns
         if 'sqli' in modules:
-            sqli_patterns = [
-                r'execute\s*\(\s*["\'].*%s.*["\']',  # String formatting in SQL
-                r'execute\s*\(\s*.*\+.*\)',  # String concatenation in SQL
-                r'cursor\.execute\s*\(\s*f["\']',  # f-strings in SQL
-            ]
-            
-            for line_num, line in enumerate(lines, 1):
-                for pattern in sqli_patterns:
-                    if re.search(pattern, line):
-                        findings.append({
-                            'type': 'sqli',
-                            'severity': 'high',
-                            'file': file_path,
-                            'line': line_num,
-                            'description': 'Potential SQL injection via string formatting',
-                            'evidence': line.strip(),
-                            'remediation': 'Use parameterized queries or ORMs',
-                            'source': 'static',
-                            'confidence': 0.8
-                        })
+            for line_num, line in self._matching_lines(_PY_SQLI_RE, content, line_starts, line_hits):
+                findings.append(Finding(
+                    type='sqli',
+                    severity='high',
+                    file=file_path,
+                    line=line_num,
+                    description='Potential SQL injection via string formatting',
+                    evidence=_decode_line(line),
+                    remediation='Use parameterized queries or ORMs',
+                    source='static',
+                    confidence=0.8
+                ))
         
         # Command Injection (RCE) patterns
         if 'rce' in modules:
-            rce_patterns = [
-                r'os\.system\s*\(',
-                r'subprocess\.call\s*\(',
-                r'eval\s*\(',
-                r'exec\s*\(',
-            ]
-            
-            for line_num, line in enumerate(lines, 1):
-                for pattern in rce_patterns:
-                    if re.search(pattern, line):
-                        # Check if user input is involved
-                        if any(keyword in line for keyword in ['request', 'input', 'argv', 'get', 'post']):
-                            findings.append({
-                                'type': 'rce',
-                                'severity': 'critical',
-                                'file': file_path,
-                                'line': line_num,
-                                'description': 'Command injection risk with user input',
-                                'evidence': line.strip(),
-                                'remediation': 'Avoid using dangerous functions with user input',
-                                'source': 'static',
-                                'confidence': 0.9
-                            })
+            for line_num, line in self._matching_lines(_PY_RCE_RE, content, line_starts, line_hits):
+                # Check if user input is involved
+                if _PY_USER_INPUT_RE.search(line):
+                    findings.append(Finding(
+                        type='rce',
+                        severity='critical',
+                        file=file_path,
+                        line=line_num,
+                        description='Command injection risk with user input',
+                        evidence=_decode_line(line),
+                        remediation='Avoid using dangerous functions with user input',
+                        source='static',
+                        confidence=0.9
+                    ))
         
         # Path Traversal patterns
         if 'path_traversal' in modules:
-            path_patterns = [
-                r'open\s*\(\s*.*request',
-                r'Path\s*\(\s*.*request',
-                r'file\s*=\s*.*request',
-            ]
-            
-            for line_num, line in enumerate(lines, 1):
-                for pattern in path_patterns:
-                    if re.search(pattern, line, re.IGNORECASE):
-                        findings.append({
-                            'type': 'path_traversal',
-                            'severity': 'high',
-                            'file': file_path,
-                            'line': line_num,
-                            'description': 'Path traversal vulnerability - user input in file operations',
-                            'evidence': line.strip(),
-                            'remediation': 'Validate and sanitize file paths',
-                            'source': 'static',
-                            'confidence': 0.7
-                        })
+            for line_num, line in self._matching_lines(_PY_PATH_RE, content, line_starts, line_hits):
+                findings.append(Finding(
+                    type='path_traversal',
+                    severity='high',
+                    file=file_path,
+                    line=line_num,
+                    description='Path traversal vulnerability - user input in file operations',
+                    evidence=_decode_line(line),
+                    remediation='Validate and sanitize file paths',
+                    source='static',
+                    confidence=0.7
+                ))
         
         # Insecure cryptography
         if 'crypto' in modules:
-            crypto_patterns = [
-                r'hashlib\.md5\s*\(',
-                r'hashlib\.sha1\s*\(',
-                r'DES\.',
-                r'mode\s*=\s*ECB',
-            ]
-            
-            for line_num, line in enumerate(lines, 1):
-                for pattern in crypto_patterns:
-                    if re.search(pattern, line):
-                        findings.append({
-                            'type': 'weak_crypto',
-                            'severity': 'medium',
-                            'file': file_path,
-                            'line': line_num,
-                            'description': 'Use of weak cryptographic algorithm',
-                            'evidence': line.strip(),
-                            'remediation': 'Use modern cryptographic algorithms (SHA-256, AES-GCM)',
-                            'source': 'static',
-                            'confidence': 1.0
-                        })
+            for line_num, line in self._matching_lines(_PY_CRYPTO_RE, content, line_starts, line_hits):
+                findings.append(Finding(
+                    type='weak_crypto',
+                    severity='medium',
+                    file=file_path,
+                    line=line_num,
+                    description='Use of weak cryptographic algorithm',
+                    evidence=_decode_line(line),
+                    remediation='Use modern cryptographic algorithms (SHA-256, AES-GCM)',
+                    source='static',
+                    confidence=1.0
+                ))
         
         return findings
     
-    def _scan_javascript_patterns(self, content: str, file_path: str, modules: List[str]) -> List[Dict[str, Any]]:
+    def _scan_javascript_patterns(
+        self,
+        content: bytes,
+        file_path: str,
+        modules: List[str],
+        line_starts: Optional[List[int]] = None,
+        line_hits: Optional[Dict[re.Pattern, List[int]]] = None
+    ) -> List[Finding]:
         """Scan JavaScript/TypeScript code for vulnerability patterns"""
         findings = []
-        lines = content.split('\n')
+        
+        if line_starts is None:
+            line_starts = _line_index(content)
         
         # XSS patterns
         if 'xss' in modules:
-            xss_patterns = [
-                r'innerHTML\s*=',
-                r'dangerouslySetInnerHTML',
-                r'document\.write\s*\(',
-                r'\.html\s*\(',  # jQuery .html()
-            ]
-            
-            for line_num, line in enumerate(lines, 1):
-                for pattern in xss_patterns:
-                    if re.search(pattern, line):
-                        # Check if user input is involved
-                        if any(keyword in line for keyword in ['req.', 'params', 'query', 'body', 'input']):
-                            findings.append({
-                                'type': 'xss',
-                                'severity': 'high',
-                                'file': file_path,
-                                'line': line_num,
-                                'description': 'XSS vulnerability - unescaped user input in DOM',
-                                'evidence': line.strip(),
-                                'remediation': 'Escape user input or use safe APIs',
-                                'source': 'static',
-                                'confidence': 0.8
-                            })
+            for line_num, line in self._matching_lines(_JS_XSS_RE, content, line_starts, line_hits):
+                # Check if user input is involved
+                if _JS_XSS_INPUT_RE.search(line):
+                    findings.append(Finding(
+                        type='xss',
+                        severity='high',
+                        file=file_path,
+                        line=line_num,
+                        description='XSS vulnerability - unescaped user input in DOM',
+                        evidence=_decode_line(line),
+                        remediation='Escape user input or use safe APIs',
+                        source='static',
+                        confidence=0.8
+                    ))
         
         # SQL Injection patterns
         if 'sqli' in modules:
-            sqli_patterns = [
-                r'query\s*\(\s*["`\'].*\$\{',  # Template literals in SQL
-                r'query\s*\(\s*.*\+.*\)',  # String concatenation in SQL
-            ]
-            
-            for line_num, line in enumerate(lines, 1):
-                for pattern in sqli_patterns:
-                    if re.search(pattern, line):
-                        findings.append({
-                            'type': 'sqli',
-                            'severity': 'high',
-                            'file': file_path,
-                            'line': line_num,
-                            'description': 'SQL injection via string interpolation',
-                            'evidence': line.strip(),
-                            'remediation': 'Use parameterized queries',
-                            'source': 'static',
-                            'confidence': 0.8
-                        })
+            for line_num, line in self._matching_lines(_JS_SQLI_RE, content, line_starts, line_hits):
+                findings.append(Finding(
+                    type='sqli',
+                    severity='high',
+                    file=file_path,
+                    line=line_num,
+                    description='SQL injection via string interpolation',
+                    evidence=_decode_line(line),
+                    remediation='Use parameterized queries',
+                    source='static',
+                    confidence=0.8
+                ))
         
         # Command Injection
         if 'rce' in modules:
-            rce_patterns = [
-                r'exec\s*\(',
-                r'spawn\s*\(',
-                r'execSync\s*\(',
-            ]
-            
-            for line_num, line in enumerate(lines, 1):
-                for pattern in rce_patterns:
-                    if re.search(pattern, line):
-                        if any(keyword in line for keyword in ['req.', 'params', 'query', 'body']):
-                            findings.append({
-                                'type': 'rce',
-                                'severity': 'critical',
-                                'file': file_path,
-                                'line': line_num,
-                                'description': 'Command injection with user input',
-                                'evidence': line.strip(),
-                                'remediation': 'Avoid executing user-controlled commands',
-                                'source': 'static',
-                                'confidence': 0.9
-                            })
+            for line_num, line in self._matching_lines(_JS_RCE_RE, content, line_starts, line_hits):
+                if _JS_RCE_INPUT_RE.search(line):
+                    findings.append(Finding(
+                        type='rce',
+                        severity='critical',
+                        file=file_path,
+                        line=line_num,
+                        description='Command injection with user input',
+                        evidence=_decode_line(line),
+                        remediation='Avoid executing user-controlled commands',
+                        source='static',
+                        confidence=0.9
+                    ))
         
         return findings
+
+
+def _static_scan_file(file_path: str, language: str, modules: List[str]) -> Tuple[List[Finding], Optional[str]]:
+    """
+    Read a file and run the static checks on it (process pool worker)
+    
+    The patterns run over the raw bytes; large files are memory-mapped
+    rather than copied, and only files small enough for the LLM are decoded.
+    
+    Returns:
+        (findings, content) - content is None unless the file should also
+        go through LLM analysis
+    """
+    scanner = CodeScanner(None)
+    
+    try:
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            # The RE2 bindings take bytes, so mapping only pays off with re
+            if size >= MMAP_THRESHOLD and re2 is None:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return scanner._static_scan(mm, file_path, language, modules), None
+            data = f.read()
+    except Exception as e:
+        logger.warning("Error reading %s: %s", file_path, e)
+        return [], None
+    
+    # Skip empty or very short files
+    if len(data.strip()) < 20:
+        return [], None
+    
+    findings = scanner._static_scan(data, file_path, language, modules)
+    
+    content = data.decode('utf-8', errors='ignore')
+    return findings, (content if len(content) < LLM_MAX_CHARS else None)
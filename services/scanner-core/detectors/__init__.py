@@ -6,10 +6,14 @@ from .injection_detector import SQLInjectionDetector
 from .xss_detector import XSSDetector
 from .ssrf_detector import SSRFDetector
 from .brute_force_detector import BruteForceDetector
+from .unified_detector import UnifiedInjectionDetector
+from .types import Finding
 
 __all__ = [
     'SQLInjectionDetector',
     'XSSDetector',
     'SSRFDetector',
-    'BruteForceDetector'
+    'BruteForceDetector',
+    'UnifiedInjectionDetector',
+    'Finding'
 ]
@@ -11,12 +11,36 @@ Supports:
 import asyncio
 import aiohttp
 import itertools
+import logging
+import os
 import string
-from typing import Dict, List, Optional, Tuple, Set
-from datetime import datetime
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Set
 import json
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
+
+class _RateLimiter:
+    """Token bucket shared by all workers: attempts start at least `interval` seconds apart"""
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_slot = 0.0
+    
+    async def acquire(self):
+        """Wait for the next free slot"""
+        if self.interval <= 0:
+            return
+        
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot)
+        # Reserve the slot before sleeping so concurrent callers queue up behind it
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
 
 class BruteForceDetector:
     """Advanced brute force authentication testing"""
@@ -37,7 +61,8 @@ class BruteForceDetector:
                  max_length=4,
                  rate_limit=0.1,
                  max_attempts=10000,
-                 stop_on_success=True):
+                 stop_on_success=True,
+                 concurrency=32):
         """
         Initialize brute force detector
         
@@ -46,9 +71,10 @@ class BruteForceDetector:
             charsets: List of charset names or 'all'
             min_length: Minimum password length for exhaustive
             max_length: Maximum password length for exhaustive (WARNING: >6 is SLOW)
-            rate_limit: Delay between attempts (seconds)
+            rate_limit: Delay between attempts (seconds), enforced across all workers
             max_attempts: Maximum total attempts (safety limit)
             stop_on_success: Stop after first valid credential found
+            concurrency: Number of credentials tested in parallel
         """
         self.strategy = strategy
         self.charsets = charsets or ['lowercase', 'numbers']
@@ -57,12 +83,22 @@ class BruteForceDetector:
         self.rate_limit = rate_limit
         self.max_attempts = max_attempts
         self.stop_on_success = stop_on_success
+        self.concurrency = max(1, concurrency)
+        
+        # Per-attempt progress is only reported when explicitly requested
+        self.verbose = os.environ.get('SCAN_VERBOSE', '').lower() in ('1', 'true')
+        
+        # Combined charset is fixed for the detector's lifetime
+        self._charset = self._get_charset()
         
         # Statistics
         self.attempts = 0
         self.start_time = None
         self.found_credentials = []
         
+        # Credentials already tested in this run (strategies overlap, e.g. admin/admin)
+        self._tried: Set[Tuple[str, str]] = set()
+        
         # Load wordlists
         self.default_credentials = self._load_default_credentials()
         self.common_passwords = self._load_common_passwords()
@@ -117,17 +153,19 @@ class BruteForceDetector:
         # Remove duplicates while preserving order
         return ''.join(dict.fromkeys(combined))
     
-    def generate_exhaustive_passwords(self, length: int) -> itertools.product:
+    def generate_exhaustive_passwords(self, length: int) -> Iterator[str]:
         """
         Generate all possible password combinations for given length
         
+        Passwords are joined inside map() so no per-candidate Python
+        frame is spent turning product tuples into strings.
+        
         WARNING: This can generate MASSIVE number of combinations!
         - 4 chars with lowercase only (26^4) = 456,976
         - 4 chars with all chars (95^4) = 81,450,625
         - 8 chars with all chars (95^8) = 6.6 quadrillion!
         """
-        charset = self._get_charset()
-        return itertools.product(charset, repeat=length)
+        return map(''.join, itertools.product(self._charset, repeat=length))
     
     async def detect(self, target_url: str, username: Optional[str] = None) -> Dict:
         """
@@ -139,33 +177,32 @@ class BruteForceDetector:
             - time_taken: Seconds elapsed
             - strategy_used: Which strategy succeeded
         """
-        self.start_time = datetime.now()
+        self.start_time = time.monotonic()
         self.attempts = 0
         self.found_credentials = []
+        self._tried.clear()
         
-        print(f"[BRUTE FORCE] Starting attack on: {target_url}")
-        print(f"[BRUTE FORCE] Strategy: {self.strategy}")
-        print(f"[BRUTE FORCE] Character sets: {self.charsets}")
-        print(f"[BRUTE FORCE] Length range: {self.min_length}-{self.max_length}")
+        logger.info("Starting brute force attack on: %s", target_url)
+        logger.info("Strategy: %s | Character sets: %s | Length range: %d-%d",
+                    self.strategy, self.charsets, self.min_length, self.max_length)
         
         # Strategy 1: Default Credentials (fastest)
         if self.strategy in ['default', 'hybrid']:
-            print("[BRUTE FORCE] Trying default credentials...")
+            logger.info("Trying default credentials...")
             found = await self._try_default_credentials(target_url, username)
             if found and self.stop_on_success:
                 return self._build_result('default')
         
         # Strategy 2: Wordlist Attack
         if self.strategy in ['wordlist', 'hybrid']:
-            print("[BRUTE FORCE] Trying wordlist attack...")
+            logger.info("Trying wordlist attack...")
             found = await self._try_wordlist(target_url, username)
             if found and self.stop_on_success:
                 return self._build_result('wordlist')
         
         # Strategy 3: Exhaustive Brute Force (slowest)
         if self.strategy in ['exhaustive', 'hybrid']:
-            print("[BRUTE FORCE] Starting exhaustive brute force...")
-            print(f"[WARNING] This may take a VERY long time!")
+            logger.info("Starting exhaustive brute force (this may take a VERY long time)...")
             found = await self._try_exhaustive(target_url, username)
             if found:
                 return self._build_result('exhaustive')
@@ -176,62 +213,136 @@ class BruteForceDetector:
         """Try common default username/password combinations"""
         if username:
             # Try specific username with its defaults
-            if username in self.default_credentials:
-                for password in self.default_credentials[username]:
-                    if await self._test_credential(target_url, username, password):
-                        return True
+            credentials = ((username, password) for password in self.default_credentials.get(username, []))
         else:
             # Try all default combinations
-            for user, passwords in self.default_credentials.items():
-                for password in passwords:
-                    if await self._test_credential(target_url, user, password):
-                        return True
+            credentials = (
+                (user, password)
+                for user, passwords in self.default_credentials.items()
+                for password in passwords
+            )
         
-        return False
+        return await self._run_workers(target_url, credentials)
     
     async def _try_wordlist(self, target_url: str, username: Optional[str]) -> bool:
         """Try wordlist-based attack"""
         usernames = [username] if username else self.common_usernames
         
-        for user in usernames:
-            for password in self.common_passwords:
-                if await self._test_credential(target_url, user, password):
-                    return True
-        
-        return False
+        credentials = ((user, password) for user in usernames for password in self.common_passwords)
+        return await self._run_workers(target_url, credentials)
     
     async def _try_exhaustive(self, target_url: str, username: Optional[str]) -> bool:
         """Try exhaustive character-based brute force"""
-        charset = self._get_charset()
+        charset = self._charset
         total_combinations = sum(len(charset) ** length 
                                 for length in range(self.min_length, self.max_length + 1))
         
-        print(f"[BRUTE FORCE] Charset: {charset[:20]}... ({len(charset)} chars)")
-        print(f"[BRUTE FORCE] Estimated combinations: {total_combinations:,}")
+        logger.info("Charset: %s... (%d chars) | Estimated combinations: %s",
+                    charset[:20], len(charset), f"{total_combinations:,}")
         
         if total_combinations > 1000000:
-            print(f"[WARNING] {total_combinations:,} combinations will take VERY long!")
-            print(f"[TIP] Consider reducing max_length or using fewer character sets")
+            logger.warning("%s combinations will take VERY long! "
+                           "Consider reducing max_length or using fewer character sets", f"{total_combinations:,}")
         
         usernames = [username] if username else self.common_usernames
         
-        # Try each length incrementally
-        for length in range(self.min_length, self.max_length + 1):
-            print(f"[BRUTE FORCE] Trying length {length}...")
+        def credentials():
+            # Try each length incrementally
+            for length in range(self.min_length, self.max_length + 1):
+                logger.debug("Trying length %d...", length)
+                
+                for password in self.generate_exhaustive_passwords(length):
+                    for user in usernames:
+                        yield user, password
+        
+        return await self._run_workers(target_url, credentials())
+    
+    async def _run_workers(self, target_url: str, credentials: Iterable[Tuple[str, str]]) -> bool:
+        """
+        Test credentials with a pool of concurrent workers
+        
+        Credentials are pulled lazily through a bounded queue, so exhaustive
+        generators are never materialized. A shared token bucket keeps the
+        overall attempt rate within rate_limit. With stop_on_success, the
+        first valid credential stops the generator and cancels the requests
+        still in flight.
+        
+        Returns True if any credential was valid
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        limiter = _RateLimiter(self.rate_limit)
+        found = False
+        done = asyncio.Event()
+        
+        async def worker():
+            nonlocal found
+            while True:
+                item = await queue.get()
+                if item is None or done.is_set():
+                    return
+                await limiter.acquire()
+                if await self._test_credential(target_url, *item):
+                    found = True
+                    if self.stop_on_success:
+                        done.set()
+                        return
+        
+        async def put(credential) -> bool:
+            try:
+                queue.put_nowait(credential)
+                return True
+            except asyncio.QueueFull:
+                pass
             
-            for password_tuple in self.generate_exhaustive_passwords(length):
-                password = ''.join(password_tuple)
+            # Race the put against success so a full queue can't stall the producer
+            put_task = asyncio.ensure_future(queue.put(credential))
+            done_task = asyncio.ensure_future(done.wait())
+            await asyncio.wait((put_task, done_task), return_when=asyncio.FIRST_COMPLETED)
+            done_task.cancel()
+            if not put_task.done():
+                put_task.cancel()
+                return False
+            return True
+        
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            queued = self.attempts
+            for credential in credentials:
+                if done.is_set():
+                    break
                 
-                for user in usernames:
-                    if await self._test_credential(target_url, user, password):
-                        return True
+                # Skip credentials an earlier strategy already tested
+                if credential in self._tried:
+                    continue
                 
                 # Safety check
-                if self.attempts >= self.max_attempts:
-                    print(f"[BRUTE FORCE] Max attempts ({self.max_attempts}) reached!")
-                    return False
+                if queued >= self.max_attempts:
+                    logger.warning("Max attempts (%d) reached!", self.max_attempts)
+                    break
+                
+                self._tried.add(credential)
+                if not await put(credential):
+                    break
+                queued += 1
+            
+            if not done.is_set():
+                for _ in workers:
+                    if not await put(None):
+                        break
+                # Finish the queued credentials unless one of them succeeds first
+                waiter = asyncio.ensure_future(done.wait())
+                pending = set(workers)
+                while pending and not done.is_set():
+                    _, pending = await asyncio.wait(pending | {waiter}, return_when=asyncio.FIRST_COMPLETED)
+                    pending.discard(waiter)
+                waiter.cancel()
+        finally:
+            # Cancel siblings still waiting on a response once a credential worked
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
         
-        return False
+        return found
     
     async def _test_credential(self, target_url: str, username: str, password: str) -> bool:
         """
@@ -241,15 +352,12 @@ class BruteForceDetector:
         """
         self.attempts += 1
         
-        # Progress feedback every 100 attempts
-        if self.attempts % 100 == 0:
-            elapsed = (datetime.now() - self.start_time).total_seconds()
+        # Progress feedback every 100 attempts (SCAN_VERBOSE only)
+        if self.verbose and self.attempts % 100 == 0:
+            elapsed = time.monotonic() - self.start_time
             rate = self.attempts / elapsed if elapsed > 0 else 0
-            print(f"[PROGRESS] Attempts: {self.attempts} | Rate: {rate:.1f}/sec | Testing: {username}:{password[:3]}...")
-        
-        # Rate limiting
-        if self.rate_limit > 0:
-            await asyncio.sleep(self.rate_limit)
+            logger.info("Attempts: %d | Rate: %.1f/sec | Testing: %s:%s...",
+                        self.attempts, rate, username, password[:3])
         
         # TODO: Implement actual HTTP testing
         # For now, simulate testing
@@ -269,7 +377,7 @@ class BruteForceDetector:
     
     def _build_result(self, strategy_used: str) -> Dict:
         """Build final result dictionary"""
-        elapsed = (datetime.now() - self.start_time).total_seconds()
+        elapsed = time.monotonic() - self.start_time
         
         return {
             'found_credentials': self.found_credentials,
@@ -0,0 +1,102 @@
+"""
+Source Excerpts
+
+Cuts a source file down to the lines around its pre-check hits, so the LLM
+only reads the code that can carry a data flow
+"""
+
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .prescreen import NeedleMatcher
+
+# Lines of context kept around each hit
+EXCERPT_LINES_BEFORE = 20
+EXCERPT_LINES_AFTER = 20
+
+# An excerpt is only used when it drops at least this share of the source;
+# otherwise the whole file is sent and no context is lost
+EXCERPT_MAX_RATIO = 0.5
+
+
+def excerpt_source(
+    source_code: str,
+    matchers: Iterable[NeedleMatcher],
+    lines_before: int = EXCERPT_LINES_BEFORE,
+    lines_after: int = EXCERPT_LINES_AFTER,
+    max_ratio: float = EXCERPT_MAX_RATIO
+) -> Optional[Tuple[str, int]]:
+    """
+    Extract the lines around every sink and entry point hit
+    
+    Overlapping windows are merged, and each window starts with a
+    "Line N:" marker giving its first line number in the original file.
+    
+    Args:
+        source_code: Source text
+        matchers: Matchers whose hits the windows are centered on
+        lines_before: Lines kept above each hit
+        lines_after: Lines kept below each hit
+        max_ratio: Largest excerpt size, as a share of the source length
+    
+    Returns:
+        (excerpt, number of lines with a hit), or None if the excerpt would not be at least
+        that much smaller than the source
+    """
+    hits = {offset for matcher in matchers for offset in matcher.offsets(source_code)}
+    if not hits:
+        return None
+    
+    lines = source_code.splitlines(keepends=True)
+    line_starts = list(accumulate(map(len, lines), initial=0))
+    
+    # Merge the [first, last) line ranges of neighbouring hits; the matchers
+    # may report overlapping needles, so hits are counted per line
+    hit_lines = sorted({bisect_right(line_starts, offset) - 1 for offset in hits})
+    windows = []
+    for line in hit_lines:
+        first = max(line - lines_before, 0)
+        last = min(line + lines_after + 1, len(lines))
+        if windows and first <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], last)
+        else:
+            windows.append([first, last])
+    
+    size = sum(line_starts[last] - line_starts[first] for first, last in windows)
+    if size > len(source_code) * max_ratio:
+        return None
+    
+    parts = []
+    for first, last in windows:
+        body = "".join(lines[first:last])
+        if not body.endswith("\n"):
+            body += "\n"
+        parts.append(f"Line {first + 1}:\n{body}")
+    
+    return "\n".join(parts), len(hit_lines)
+
+
+def excerpt_trace_args(trace_args: Dict[str, Any], matchers: Iterable[NeedleMatcher]) -> None:
+    """
+    Replace the source in trace_data_flow arguments with its excerpt
+    
+    The context gains original_length and hit_count (lines with a hit), so the LLM knows it
+    sees part of a larger file. The arguments are left unchanged when the
+    source has no worthwhile excerpt.
+    
+    Args:
+        trace_args: trace_data_flow keyword arguments; updated in place
+        matchers: Matchers whose hits the windows are centered on
+    """
+    source_code = trace_args["source_code"]
+    excerpt = excerpt_source(source_code, matchers)
+    if excerpt is None:
+        return
+    
+    trace_args["source_code"], hit_count = excerpt
+    trace_args["context"] = {
+        **trace_args["context"],
+        "original_length": len(source_code),
+        "hit_count": hit_count
+    }
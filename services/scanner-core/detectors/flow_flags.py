@@ -0,0 +1,129 @@
+"""
+Data Flow Flags
+
+One keyword table, shared by the SSRF and XSS detectors, that classifies
+the text of an LLM-reported data flow in a single scan
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Pattern
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+# What a keyword says about a flow; plain int bits, since enum.IntFlag
+# operators cost more than the scan itself
+FLAG_CLOUD = 1          # SSRF can reach a cloud provider API
+FLAG_METADATA = 2       # SSRF can reach an instance metadata service
+FLAG_INTERNAL = 4       # SSRF can reach internal hosts
+FLAG_STORED = 8         # XSS payload is persisted before rendering
+FLAG_DOM_SINK = 16      # XSS sink is a client-side DOM write
+FLAG_DOM_SOURCE = 32    # XSS source is the browser location
+FLAG_ALL = 63
+
+# Lowercase keyword -> flags it sets
+FLOW_KEYWORDS: Dict[str, int] = {
+    "aws": FLAG_CLOUD,
+    "gcp": FLAG_CLOUD,
+    "azure": FLAG_CLOUD,
+    "metadata": FLAG_CLOUD | FLAG_METADATA,
+    "169.254.169.254": FLAG_CLOUD,
+    "cloud": FLAG_METADATA,
+    "internal": FLAG_INTERNAL,
+    "localhost": FLAG_INTERNAL,
+    "127.0.0.1": FLAG_INTERNAL,
+    "database": FLAG_STORED,
+    "save": FLAG_STORED,
+    "innerhtml": FLAG_DOM_SINK,
+    "outerhtml": FLAG_DOM_SINK,
+    "document.write": FLAG_DOM_SINK,
+    "document.location": FLAG_DOM_SOURCE,
+    "window.location": FLAG_DOM_SOURCE,
+    "document.url": FLAG_DOM_SOURCE,
+}
+
+
+def _build_automaton():
+    """Aho-Corasick automaton over the keywords, or None without pyahocorasick"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword, flags in FLOW_KEYWORDS.items():
+        automaton.add_word(keyword, flags)
+    automaton.make_automaton()
+    return automaton
+
+
+def _contained_flags() -> Dict[str, int]:
+    """Flags of each keyword combined with those of the keywords inside it"""
+    combined = {}
+    for keyword in FLOW_KEYWORDS:
+        flags = 0
+        for other, other_flags in FLOW_KEYWORDS.items():
+            if other in keyword:
+                flags |= other_flags
+        combined[keyword] = flags
+    return combined
+
+
+_AUTOMATON = _build_automaton()
+
+# A regex reports one keyword per position, the longest, so each keyword
+# carries the flags of the keywords inside it
+_KEYWORD_FLAGS = _contained_flags()
+
+
+@lru_cache(maxsize=None)
+def _keyword_regex(wanted: int) -> Pattern[str]:
+    """
+    Regex over the keywords that set any of the wanted flags
+    
+    For a single flag any match answers the question, so a plain
+    alternation is searched. For several flags every keyword is needed;
+    a zero-width lookahead then also finds overlapping keywords.
+    """
+    keywords = sorted(
+        (keyword for keyword, flags in _KEYWORD_FLAGS.items() if flags & wanted),
+        key=len,
+        reverse=True
+    )
+    alternation = "|".join(map(re.escape, keywords))
+    if wanted & (wanted - 1) == 0:
+        return re.compile(alternation)
+    return re.compile(f"(?=({alternation}))")
+
+
+def flow_flags(text: str, wanted: int = FLAG_ALL) -> int:
+    """
+    Classify data flow text
+    
+    Overlapping keywords ("127.0.0.169.254...") are all seen, and the scan
+    stops as soon as every wanted flag has been found.
+    
+    Args:
+        text: Lowercased flow text (sink, source or joined flow steps)
+        wanted: FLAG_* bits the caller needs
+    
+    Returns:
+        The wanted FLAG_* bits set by the keywords in text
+    """
+    if _AUTOMATON is not None:
+        flags = 0
+        for _, keyword_flags in _AUTOMATON.iter(text):
+            flags |= keyword_flags
+            if flags & wanted == wanted:
+                break
+        return flags & wanted
+    
+    regex = _keyword_regex(wanted)
+    if wanted & (wanted - 1) == 0:
+        return wanted if regex.search(text) else 0
+    
+    flags = 0
+    for keyword in regex.findall(text):
+        flags |= _KEYWORD_FLAGS[keyword]
+    return flags & wanted
@@ -5,15 +5,23 @@ Detects SQL injection vulnerabilities using LLM-powered data flow analysis
 """
 
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
 
+from .excerpts import excerpt_trace_args
+from .prescreen import MatcherChain, NeedleMatcher, as_text
+from .streaming import trace_and_enrich
+from .types import Finding
+
 logger = logging.getLogger(__name__)
 
 
 class SQLInjectionDetector:
     """SQL Injection vulnerability detector"""
     
+    # Key of this detector in ScannerCore.detectors and prescreen results
+    DETECTOR_ID = "sqli"
+    
     # Common SQL injection entry points
     ENTRY_POINTS = [
         "request.GET",
@@ -45,23 +53,42 @@ class SQLInjectionDetector:
         "connection.execute("
     ]
     
-    def __init__(self, llm_orchestrator):
+    # Pre-check matchers: each scans the source once for all of its literals
+    _SINK_MATCHER = NeedleMatcher(DANGEROUS_SINKS)
+    _ENTRY_MATCHER = NeedleMatcher(ENTRY_POINTS)
+    _PRECHECK = MatcherChain(_SINK_MATCHER, _ENTRY_MATCHER)
+    
+    def __init__(self, llm_orchestrator, excerpt_sources: bool = True):
         """
         Initialize detector
         
         Args:
             llm_orchestrator: LLM orchestrator instance
+            excerpt_sources: Send the LLM only the lines around sink and
+                             entry point hits when that drops most of a file
         """
         self.llm = llm_orchestrator
+        self.excerpt_sources = excerpt_sources
     
-    async def analyze(self, source_code: str, file_path: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def analyze(
+        self,
+        source_code: Union[str, bytes],
+        file_path: str,
+        context: Dict[str, Any],
+        prescreen: Optional[Dict[str, bool]] = None,
+        enrich_findings: bool = False
+    ) -> List[Finding]:
         """
         Analyze code for SQL injection vulnerabilities
         
         Args:
-            source_code: Source code to analyze
+            source_code: Source code to analyze, as text or raw UTF-8 bytes
             file_path: Path to the source file
             context: Additional context (language, framework, etc.)
+            prescreen: PatternPrescreen.scan() result for this code, if the
+                       caller already pre-checked it
+            enrich_findings: Also fetch remediation and CVSS for each
+                             finding, starting as soon as its flow arrives
             
         Returns:
             List of vulnerability findings
@@ -71,53 +98,80 @@ class SQLInjectionDetector:
         findings = []
         
         # Step 1: Quick pattern matching for potential issues
-        has_sql_operations = any(sink in source_code for sink in self.DANGEROUS_SINKS)
-        has_user_input = any(entry in source_code for entry in self.ENTRY_POINTS)
-        
-        if not (has_sql_operations and has_user_input):
+        if not self._passes_precheck(source_code, prescreen):
             logger.debug(f"No SQL operations or user input found in {file_path}")
             return findings
         
         # Step 2: Use LLM for deep data flow analysis
         try:
-            analysis_result = await self.llm.trace_data_flow(
-                source_code=source_code,
-                entry_points=self.ENTRY_POINTS,
-                dangerous_sinks=self.DANGEROUS_SINKS,
-                context={
+            trace_args = {
+                "source_code": as_text(source_code),
+                "entry_points": self.ENTRY_POINTS,
+                "dangerous_sinks": self.DANGEROUS_SINKS,
+                "context": {
                     "file_path": file_path,
                     "vulnerability_type": "SQL Injection",
                     "language": context.get("language", "unknown"),
                     "framework": context.get("framework", "unknown")
                 }
-            )
+            }
+            
+            # Send only the code around the hits when that drops most of the file
+            if self.excerpt_sources:
+                excerpt_trace_args(trace_args, (self._SINK_MATCHER, self._ENTRY_MATCHER))
+            
+            if enrich_findings:
+                return await trace_and_enrich(self.llm, file_path, lambda flow: self, **trace_args)
+            
+            analysis_result = await self.llm.trace_data_flow(**trace_args)
             
             # Step 3: Process analysis results
-            for finding in analysis_result.findings:
-                if finding.get("exploitable", False):
-                    vulnerability = {
-                        "type": "SQL Injection",
-                        "severity": finding.get("severity", "medium"),
-                        "file_path": file_path,
-                        "source": finding.get("source", "unknown"),
-                        "sink": finding.get("sink", "unknown"),
-                        "flow_path": finding.get("flow_steps", []),
-                        "sanitization": finding.get("sanitization", "none"),
-                        "description": self._generate_description(finding),
-                        "attack_vector": finding.get("attack_vector", ""),
-                        "confidence": analysis_result.confidence_score,
-                        "provider": analysis_result.provider.value,
-                        "cwe": "CWE-89"
-                    }
-                    
-                    findings.append(vulnerability)
-                    logger.warning(f"SQL Injection found in {file_path}: {vulnerability['source']} -> {vulnerability['sink']}")
+            findings = self._build_findings(analysis_result, file_path)
         
         except Exception as e:
             logger.error(f"Error analyzing {file_path} for SQL injection: {str(e)}")
         
         return findings
     
+    def _passes_precheck(self, source_code: Union[str, bytes], prescreen: Optional[Dict[str, bool]] = None) -> bool:
+        """Check that the code has both a SQL operation and a user input source"""
+        if prescreen is not None:
+            return prescreen.get(self.DETECTOR_ID, False)
+        return self._PRECHECK.search(source_code)
+    
+    def _build_findings(self, analysis_result, file_path: str) -> List[Finding]:
+        """Build vulnerability findings from the exploitable data flows of an analysis"""
+        return [
+            self._build_finding(finding, file_path, analysis_result.confidence_score, analysis_result.provider.value)
+            for finding in analysis_result.findings
+            if finding.get("exploitable", False)
+        ]
+    
+    def _build_finding(self, finding: Dict[str, Any], file_path: str, confidence: float = 0.0, provider: str = "") -> Finding:
+        """
+        Build the vulnerability finding for one exploitable data flow
+        
+        Streamed flows are built before the analysis completes; their
+        confidence and provider are filled in afterwards.
+        """
+        vulnerability = Finding(
+            type="SQL Injection",
+            severity=finding.get("severity", "medium"),
+            file_path=file_path,
+            source=finding.get("source", "unknown"),
+            sink=finding.get("sink", "unknown"),
+            flow_path=finding.get("flow_steps", []),
+            sanitization=finding.get("sanitization", "none"),
+            description=self._generate_description(finding),
+            attack_vector=finding.get("attack_vector", ""),
+            confidence=confidence,
+            provider=provider,
+            cwe="CWE-89"
+        )
+        
+        logger.warning(f"SQL Injection found in {file_path}: {vulnerability.source} -> {vulnerability.sink}")
+        return vulnerability
+    
     def _generate_description(self, finding: Dict[str, Any]) -> str:
         """Generate vulnerability description"""
         source = finding.get("source", "user input")
@@ -0,0 +1,288 @@
+"""
+Detector Pre-screening
+
+Fast literal checks that decide whether a file is worth sending to the LLM
+
+The checks accept the raw file bytes (bytes or a read-only mmap) as well as
+text, so files that fail them never need to be decoded.
+"""
+
+import logging
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+logger = logging.getLogger(__name__)
+
+# Raw sources at least this large are pre-checked with hyperscan when it is
+# installed; below it, the per-match callback costs more than it saves
+HYPERSCAN_MIN_SIZE = 64 * 1024
+
+
+class NeedleMatcher:
+    """
+    Finds whether any of a fixed set of literals occurs in a text
+    
+    All needles are matched in one pass over the text (Aho-Corasick when
+    pyahocorasick is installed, otherwise one regex alternation), instead
+    of one substring scan per needle.
+    """
+    
+    def __init__(self, needles: Iterable[str]):
+        """
+        Build the matcher
+        
+        Args:
+            needles: Literal strings to look for (case-sensitive)
+        """
+        self.needles = tuple(needles)
+        
+        # pyahocorasick is built for str by default, so bytes always use a
+        # regex over the encoded needles
+        self._bytes_regex = re.compile(b'|'.join(re.escape(needle.encode('utf-8')) for needle in self.needles))
+        
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for needle in self.needles:
+                self._automaton.add_word(needle, needle)
+            self._automaton.make_automaton()
+            self._regex = None
+        else:
+            self._automaton = None
+            self._regex = re.compile('|'.join(map(re.escape, self.needles)))
+    
+    def search(self, text: Union[str, bytes]) -> bool:
+        """Return True if any needle occurs in text (str or UTF-8 bytes-like)"""
+        if not isinstance(text, str):
+            return self._bytes_regex.search(text) is not None
+        if self._automaton is not None:
+            return next(self._automaton.iter(text), None) is not None
+        return self._regex.search(text) is not None
+    
+    def offsets(self, text: str) -> List[int]:
+        """Return the start offset of every needle occurrence in text"""
+        if self._automaton is not None:
+            return [end - len(needle) + 1 for end, needle in self._automaton.iter(text)]
+        return [match.start() for match in self._regex.finditer(text)]
+
+
+class MatcherChain:
+    """
+    Requires a hit from every one of several NeedleMatchers
+    
+    A text that misses one matcher fails the check, so the remaining ones
+    are skipped. The matchers run in order of how many texts each rejected
+    so far: the one that usually fails goes first and most rejected files
+    are scanned once instead of once per matcher.
+    """
+    
+    def __init__(self, *matchers: NeedleMatcher):
+        """
+        Build the chain
+        
+        Args:
+            matchers: Matchers that must all hit, in initial order
+        """
+        self._matchers = list(matchers)
+        self._misses = Counter()
+    
+    def search(self, text: Union[str, bytes]) -> bool:
+        """Return True if every matcher finds a needle in text"""
+        for index, matcher in enumerate(self._matchers):
+            if not matcher.search(text):
+                self._misses[matcher] += 1
+                # Move a matcher ahead once it rejects more often
+                if index and self._misses[matcher] > self._misses[self._matchers[index - 1]]:
+                    self._matchers.sort(key=self._misses.__getitem__, reverse=True)
+                return False
+        return True
+
+
+class PatternPrescreen:
+    """
+    Runs the pre-checks of several detectors in one pass over the source
+    
+    Every sink and entry point literal is tagged with the detectors and
+    categories it belongs to, so a single scan answers the pre-check of
+    all detectors at once.
+    """
+    
+    def __init__(self, detectors: Dict[str, Any]):
+        """
+        Build the combined matcher
+        
+        Args:
+            detectors: Detector instances (or classes) by id; each
+                       provides DANGEROUS_SINKS and ENTRY_POINTS
+        """
+        self.detector_ids = tuple(detectors)
+        
+        tags: Dict[str, Set[Tuple[str, str]]] = {}
+        for detector_id, detector in detectors.items():
+            for category, literals in (("sink", detector.DANGEROUS_SINKS), ("entry", detector.ENTRY_POINTS)):
+                for literal in literals:
+                    tags.setdefault(literal, set()).add((detector_id, category))
+        
+        # A literal that contains another one implies it, so it carries its
+        # tags too; the regex fallback then only needs the longest match
+        # at each position
+        for literal, literal_tags in tags.items():
+            for other, other_tags in tags.items():
+                if other != literal and other in literal:
+                    literal_tags |= other_tags
+        
+        self._tags = {literal: frozenset(literal_tags) for literal, literal_tags in tags.items()}
+        self._all_tags = frozenset().union(*self._tags.values()) if self._tags else frozenset()
+        
+        # Zero-width lookahead so overlapping literals are all seen
+        longest_first = sorted(self._tags, key=len, reverse=True)
+        self._bytes_tags = {literal.encode('utf-8'): literal_tags for literal, literal_tags in self._tags.items()}
+        self._bytes_regex = re.compile(
+            b'(?=(' + b'|'.join(re.escape(literal.encode('utf-8')) for literal in longest_first) + b'))'
+        )
+        
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for literal, literal_tags in self._tags.items():
+                self._automaton.add_word(literal, literal_tags)
+            self._automaton.make_automaton()
+            self._regex = None
+        else:
+            self._automaton = None
+            self._regex = re.compile('(?=(' + '|'.join(map(re.escape, longest_first)) + '))')
+        
+        # Hyperscan scratch space must not be shared between threads, so
+        # each thread compiles its own database on first use
+        self._hs_literals = list(self._bytes_tags)
+        self._hs_local = threading.local()
+        self._hs_disabled = hyperscan is None
+    
+    def _hyperscan_database(self):
+        """Return this thread's hyperscan database of the literals, or None if unavailable"""
+        if self._hs_disabled:
+            return None
+        
+        database = getattr(self._hs_local, 'database', None)
+        if database is None:
+            database = hyperscan.Database()
+            try:
+                database.compile(
+                    expressions=[re.escape(literal) for literal in self._hs_literals],
+                    ids=list(range(len(self._hs_literals))),
+                    elements=len(self._hs_literals),
+                    # Each literal is reported once; later hits add nothing
+                    flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(self._hs_literals)
+                )
+            except hyperscan.error as e:
+                logger.warning("Hyperscan unavailable for the detector pre-check, using re: %s", e)
+                self._hs_disabled = True
+                return None
+            self._hs_local.database = database
+        return database
+    
+    def _hyperscan_hits(self, source_code: bytes) -> Optional[Set[Tuple[str, str]]]:
+        """
+        Collect the tags of every literal in raw source with hyperscan
+        
+        Returns:
+            The tags found, or None when hyperscan is not available
+        """
+        database = self._hyperscan_database()
+        if database is None:
+            return None
+        
+        found: Set[Tuple[str, str]] = set()
+        
+        def on_match(literal_id, start, end, flags, context):
+            found.update(self._bytes_tags[self._hs_literals[literal_id]])
+            # A true return value stops the scan once every tag is found
+            return len(found) == len(self._all_tags)
+        
+        # The hyperscan bindings take bytes, not arbitrary buffers such as mmap
+        data = source_code if isinstance(source_code, bytes) else bytes(source_code)
+        try:
+            database.scan(data, match_event_handler=on_match)
+        except hyperscan.error:
+            # Some binding versions report the early stop as an error
+            if len(found) != len(self._all_tags):
+                raise
+        return found
+    
+    def scan(self, source_code: Union[str, bytes]) -> Dict[str, bool]:
+        """
+        Pre-check source code for every detector
+        
+        Args:
+            source_code: Source text, or the raw UTF-8 file bytes/mmap
+        
+        Returns:
+            Detector id -> True if the code has both a sink and an entry point
+        """
+        found: Set[Tuple[str, str]] = set()
+        
+        if not isinstance(source_code, str) and len(source_code) >= HYPERSCAN_MIN_SIZE:
+            hyperscan_found = self._hyperscan_hits(source_code)
+            if hyperscan_found is not None:
+                return self._result(hyperscan_found)
+        
+        if not isinstance(source_code, str):
+            hits = (self._bytes_tags[match.group(1)] for match in self._bytes_regex.finditer(source_code))
+        elif self._automaton is not None:
+            hits = (literal_tags for _, literal_tags in self._automaton.iter(source_code))
+        else:
+            hits = (self._tags[match.group(1)] for match in self._regex.finditer(source_code))
+        
+        for literal_tags in hits:
+            found |= literal_tags
+            # Stop as soon as every detector has both kinds of hit
+            if len(found) == len(self._all_tags):
+                break
+        
+        return self._result(found)
+    
+    def _result(self, found: Set[Tuple[str, str]]) -> Dict[str, bool]:
+        """Turn the tags found in a source into the per-detector pre-check result"""
+        return {
+            detector_id: (detector_id, "sink") in found and (detector_id, "entry") in found
+            for detector_id in self.detector_ids
+        }
+
+
+# PatternPrescreen of a prescreen worker process, built by init_worker
+_worker_prescreen: Optional[PatternPrescreen] = None
+
+
+def init_worker(detector_classes: Dict[str, type]):
+    """
+    ProcessPoolExecutor initializer for prescreen_path workers
+    
+    Args:
+        detector_classes: Detector classes by id; classes rather than
+                          instances, since instances hold the LLM client
+    """
+    global _worker_prescreen
+    _worker_prescreen = PatternPrescreen(detector_classes)
+
+
+def prescreen_path(path: str) -> Dict[str, bool]:
+    """Read a file and pre-check it in a worker process (see init_worker)"""
+    with open(path, 'rb') as f:
+        return _worker_prescreen.scan(f.read())
+
+
+def as_text(source_code: Union[str, bytes]) -> str:
+    """Decode raw file bytes or mmap for the LLM prompt; text is returned unchanged"""
+    if not isinstance(source_code, str):
+        return str(source_code, 'utf-8', 'ignore')
+    return source_code
@@ -5,14 +5,32 @@ Detects SSRF vulnerabilities where user input controls server-side HTTP requests
 """
 
 import logging
-from typing import Dict, List, Any, Optional
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Union
+
+from .excerpts import excerpt_trace_args
+from .flow_flags import FLAG_CLOUD, FLAG_INTERNAL, FLAG_METADATA, flow_flags
+from .prescreen import MatcherChain, NeedleMatcher, as_text
+from .streaming import trace_and_enrich
+from .types import Finding
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class FlowFeatures:
+    """Facts about an SSRF data flow used for severity and impact"""
+    is_cloud: bool
+    is_metadata: bool
+    is_internal: bool
+
+
 class SSRFDetector:
     """SSRF vulnerability detector"""
     
+    # Key of this detector in ScannerCore.detectors and prescreen results
+    DETECTOR_ID = "ssrf"
+    
     ENTRY_POINTS = [
         "request.GET",
         "request.POST",
@@ -43,18 +61,35 @@ class SSRFDetector:
         "HttpClient"
     ]
     
-    def __init__(self, llm_orchestrator):
+    # Pre-check matchers: each scans the source once for all of its literals
+    _SINK_MATCHER = NeedleMatcher(DANGEROUS_SINKS)
+    _ENTRY_MATCHER = NeedleMatcher(ENTRY_POINTS)
+    _PRECHECK = MatcherChain(_SINK_MATCHER, _ENTRY_MATCHER)
+    
+    def __init__(self, llm_orchestrator, excerpt_sources: bool = True):
         """Initialize SSRF detector"""
         self.llm = llm_orchestrator
+        self.excerpt_sources = excerpt_sources
     
-    async def analyze(self, source_code: str, file_path: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def analyze(
+        self,
+        source_code: Union[str, bytes],
+        file_path: str,
+        context: Dict[str, Any],
+        prescreen: Optional[Dict[str, bool]] = None,
+        enrich_findings: bool = False
+    ) -> List[Finding]:
         """
         Analyze code for SSRF vulnerabilities
         
         Args:
-            source_code: Source code to analyze
+            source_code: Source code to analyze, as text or raw UTF-8 bytes
             file_path: Path to the source file
             context: Additional context
+            prescreen: PatternPrescreen.scan() result for this code, if the
+                       caller already pre-checked it
+            enrich_findings: Also fetch remediation and CVSS for each
+                             finding, starting as soon as its flow arrives
             
         Returns:
             List of SSRF vulnerability findings
@@ -64,71 +99,105 @@ class SSRFDetector:
         findings = []
         
         # Pre-check
-        has_http_request = any(sink in source_code for sink in self.DANGEROUS_SINKS)
-        has_user_input = any(entry in source_code for entry in self.ENTRY_POINTS)
-        
-        if not (has_http_request and has_user_input):
+        if not self._passes_precheck(source_code, prescreen):
             return findings
         
         try:
-            analysis_result = await self.llm.trace_data_flow(
-                source_code=source_code,
-                entry_points=self.ENTRY_POINTS,
-                dangerous_sinks=self.DANGEROUS_SINKS,
-                context={
+            trace_args = {
+                "source_code": as_text(source_code),
+                "entry_points": self.ENTRY_POINTS,
+                "dangerous_sinks": self.DANGEROUS_SINKS,
+                "context": {
                     "file_path": file_path,
                     "vulnerability_type": "Server-Side Request Forgery (SSRF)",
                     "language": context.get("language", "unknown"),
                     "framework": context.get("framework", "unknown")
                 }
-            )
+            }
             
-            for finding in analysis_result.findings:
-                if finding.get("exploitable", False):
-                    vulnerability = {
-                        "type": "SSRF",
-                        "severity": self._calculate_severity(finding),
-                        "file_path": file_path,
-                        "source": finding.get("source", "unknown"),
-                        "sink": finding.get("sink", "unknown"),
-                        "flow_path": finding.get("flow_steps", []),
-                        "sanitization": finding.get("sanitization", "none"),
-                        "description": self._generate_description(finding),
-                        "attack_vector": finding.get("attack_vector", ""),
-                        "impact": self._assess_impact(finding),
-                        "confidence": analysis_result.confidence_score,
-                        "provider": analysis_result.provider.value,
-                        "cwe": "CWE-918"
-                    }
-                    
-                    findings.append(vulnerability)
-                    logger.warning(f"SSRF vulnerability found in {file_path}")
+            # Send only the code around the hits when that drops most of the file
+            if self.excerpt_sources:
+                excerpt_trace_args(trace_args, (self._SINK_MATCHER, self._ENTRY_MATCHER))
+            
+            if enrich_findings:
+                return await trace_and_enrich(self.llm, file_path, lambda flow: self, **trace_args)
+            
+            analysis_result = await self.llm.trace_data_flow(**trace_args)
+            
+            findings = self._build_findings(analysis_result, file_path)
         
         except Exception as e:
             logger.error(f"Error analyzing {file_path} for SSRF: {str(e)}")
         
         return findings
     
-    def _calculate_severity(self, finding: Dict[str, Any]) -> str:
+    def _passes_precheck(self, source_code: Union[str, bytes], prescreen: Optional[Dict[str, bool]] = None) -> bool:
+        """Check that the code has both an HTTP request and a user input source"""
+        if prescreen is not None:
+            return prescreen.get(self.DETECTOR_ID, False)
+        return self._PRECHECK.search(source_code)
+    
+    def _build_findings(self, analysis_result, file_path: str) -> List[Finding]:
+        """Build SSRF vulnerability findings from the exploitable data flows of an analysis"""
+        return [
+            self._build_finding(finding, file_path, analysis_result.confidence_score, analysis_result.provider.value)
+            for finding in analysis_result.findings
+            if finding.get("exploitable", False)
+        ]
+    
+    def _build_finding(self, finding: Dict[str, Any], file_path: str, confidence: float = 0.0, provider: str = "") -> Finding:
+        """
+        Build the SSRF finding for one exploitable data flow
+        
+        Streamed flows are built before the analysis completes; their
+        confidence and provider are filled in afterwards.
+        """
+        features = self._analyze_flow(finding)
+        vulnerability = Finding(
+            type="SSRF",
+            severity=self._calculate_severity(finding, features),
+            file_path=file_path,
+            source=finding.get("source", "unknown"),
+            sink=finding.get("sink", "unknown"),
+            flow_path=finding.get("flow_steps", []),
+            sanitization=finding.get("sanitization", "none"),
+            description=self._generate_description(finding),
+            attack_vector=finding.get("attack_vector", ""),
+            impact=self._assess_impact(features),
+            confidence=confidence,
+            provider=provider,
+            cwe="CWE-918"
+        )
+        
+        logger.warning(f"SSRF vulnerability found in {file_path}")
+        return vulnerability
+    
+    def _analyze_flow(self, finding: Dict[str, Any]) -> FlowFeatures:
+        """Classify the flow steps of a finding in one keyword scan"""
+        flags = flow_flags(" ".join(finding.get("flow_steps", [])).lower(), FLAG_CLOUD | FLAG_METADATA | FLAG_INTERNAL)
+        
+        return FlowFeatures(
+            is_cloud=bool(flags & FLAG_CLOUD),
+            is_metadata=bool(flags & FLAG_METADATA),
+            is_internal=bool(flags & FLAG_INTERNAL)
+        )
+    
+    def _calculate_severity(self, finding: Dict[str, Any], features: FlowFeatures) -> str:
         """Calculate SSRF severity based on context"""
         # SSRF in cloud environments is typically critical
-        flow_steps = " ".join(finding.get("flow_steps", [])).lower()
-        
-        if any(x in flow_steps for x in ["aws", "gcp", "azure", "metadata", "169.254.169.254"]):
+        if features.is_cloud:
             return "critical"
         
         return finding.get("severity", "high")
     
-    def _assess_impact(self, finding: Dict[str, Any]) -> List[str]:
+    def _assess_impact(self, features: FlowFeatures) -> List[str]:
         """Assess potential impact of SSRF"""
         impacts = []
         
-        flow = " ".join(finding.get("flow_steps", [])).lower()
-        
-        if "cloud" in flow or "metadata" in flow:
+        if features.is_metadata:
             impacts.append("Cloud metadata access (credentials, keys)")
         
-        if "internal" in flow or "localhost" in flow or "127.0.0.1" in flow:
+        if features.is_internal:
             impacts.append("Internal network scanning")
             impacts.append("Bypass firewall restrictions")
         
@@ -0,0 +1,89 @@
+"""
+Streaming Detector Analysis
+
+Enriches findings while the LLM is still reporting data flows
+"""
+
+import asyncio
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+from .types import Finding
+
+
+async def enrich(detector, finding: Finding) -> Finding:
+    """
+    Add remediation and CVSS score to a finding
+    
+    The two LLM requests are independent and run concurrently.
+    
+    Args:
+        detector: Detector that built the finding; its generate_remediation
+                  and calculate_cvss are used
+        finding: Finding to enrich; updated in place
+    
+    Returns:
+        The same finding with remediation and cvss set
+    """
+    details = finding.to_dict()
+    finding.remediation, finding.cvss = await asyncio.gather(
+        detector.generate_remediation(details),
+        detector.calculate_cvss(details)
+    )
+    return finding
+
+
+async def trace_and_enrich(
+    llm,
+    file_path: str,
+    route: Callable[[Dict[str, Any]], Optional[Any]],
+    **trace_kwargs
+) -> List[Finding]:
+    """
+    Trace data flow and enrich each exploitable flow as soon as it arrives
+    
+    Remediation and CVSS requests for a flow start while the trace response
+    is still streaming, instead of after it completes.
+    
+    Args:
+        llm: LLM orchestrator; without trace_data_flow_stream, enrichment
+             starts once trace_data_flow returns
+        file_path: Path to the source file
+        route: Returns the detector that owns a flow, or None to drop it
+        **trace_kwargs: trace_data_flow arguments
+    
+    Returns:
+        Enriched findings, in the order their flows were reported
+    """
+    findings = []
+    enrichments = []
+    
+    def on_flow(flow: Dict[str, Any]):
+        if not flow.get("exploitable", False):
+            return
+        detector = route(flow)
+        if detector is None:
+            return
+        finding = detector._build_finding(flow, file_path)
+        findings.append(finding)
+        enrichments.append(asyncio.ensure_future(enrich(detector, finding)))
+    
+    try:
+        if hasattr(llm, "trace_data_flow_stream"):
+            analysis_result = await llm.trace_data_flow_stream(on_finding=on_flow, **trace_kwargs)
+        else:
+            analysis_result = await llm.trace_data_flow(**trace_kwargs)
+            for flow in analysis_result.findings:
+                on_flow(flow)
+    except BaseException:
+        for enrichment in enrichments:
+            enrichment.cancel()
+        raise
+    
+    provider = sys.intern(analysis_result.provider.value)
+    for finding in findings:
+        finding.confidence = analysis_result.confidence_score
+        finding.provider = provider
+    
+    await asyncio.gather(*enrichments)
+    return findings
@@ -0,0 +1,77 @@
+"""
+Detector Types
+
+Data structures shared by the data flow detectors
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+def _intern(value: Any) -> Any:
+    """Intern a repeated string field; other values are returned unchanged"""
+    return sys.intern(value) if type(value) is str else value
+
+
+@dataclass(slots=True)
+class Finding:
+    """
+    A data flow vulnerability found by a detector
+    
+    Detectors return Finding instances; the scanner converts them with
+    to_dict() when it reports results. Fields that only some detectors fill
+    (xss_type, impact) and the enrichment results (remediation, cvss) are
+    left out of the dict while unset.
+    """
+    type: str
+    severity: str
+    file_path: str
+    source: str
+    sink: str
+    flow_path: List[str]
+    sanitization: str
+    description: str
+    attack_vector: str
+    confidence: float
+    provider: str
+    cwe: str
+    xss_type: Optional[str] = None
+    impact: Optional[List[str]] = None
+    remediation: Optional[Dict[str, Any]] = None
+    cvss: Optional[Dict[str, Any]] = None
+    
+    def __post_init__(self):
+        # These take a handful of values across thousands of findings
+        self.type = _intern(self.type)
+        self.severity = _intern(self.severity)
+        self.provider = _intern(self.provider)
+        self.cwe = _intern(self.cwe)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the finding dict reported by the scanner"""
+        # A literal with constant keys builds the dict in one step, instead
+        # of a getattr and an insert per field name
+        result = {
+            "type": self.type,
+            "severity": self.severity,
+            "file_path": self.file_path,
+            "source": self.source,
+            "sink": self.sink,
+            "flow_path": self.flow_path,
+            "sanitization": self.sanitization,
+            "description": self.description,
+            "attack_vector": self.attack_vector,
+            "confidence": self.confidence,
+            "provider": self.provider,
+            "cwe": self.cwe
+        }
+        if self.xss_type is not None:
+            result["xss_type"] = self.xss_type
+        if self.impact is not None:
+            result["impact"] = self.impact
+        if self.remediation is not None:
+            result["remediation"] = self.remediation
+        if self.cvss is not None:
+            result["cvss"] = self.cvss
+        return result
@@ -0,0 +1,181 @@
+"""
+Unified Injection Detector
+
+Runs the SQL injection, SSRF and XSS detectors with a single LLM data flow
+request per file
+"""
+
+import logging
+from dataclasses import replace
+from typing import Dict, List, Any, Optional, Union
+
+from .excerpts import excerpt_trace_args
+from .injection_detector import SQLInjectionDetector
+from .prescreen import PatternPrescreen, as_text
+from .streaming import trace_and_enrich
+from .types import Finding
+from .ssrf_detector import SSRFDetector
+from .xss_detector import XSSDetector
+
+logger = logging.getLogger(__name__)
+
+
+class UnifiedInjectionDetector:
+    """
+    Combines the data flow detectors into one LLM request per file
+    
+    The detectors that pass the shared pre-check share one trace_data_flow call
+    over the union of their entry points, with every sink tagged by its
+    vulnerability type. Each returned flow is handed back to its detector's
+    _build_findings, so findings match the per-detector output.
+    """
+    
+    # Vulnerability type label used in the prompt, per detector id
+    VULN_TYPES = {
+        "sqli": "SQL Injection",
+        "xss": "XSS",
+        "ssrf": "SSRF"
+    }
+    
+    def __init__(self, llm_orchestrator, detectors: Optional[Dict[str, Any]] = None, excerpt_sources: bool = True):
+        """
+        Initialize unified detector
+        
+        Args:
+            llm_orchestrator: LLM orchestrator instance
+            detectors: Detector instances by id ('sqli', 'xss', 'ssrf');
+                      created from llm_orchestrator when omitted
+            excerpt_sources: Send the LLM only the lines around sink and
+                             entry point hits when that drops most of a file
+        """
+        self.llm = llm_orchestrator
+        self.excerpt_sources = excerpt_sources
+        self.detectors = detectors or {
+            "sqli": SQLInjectionDetector(llm_orchestrator, excerpt_sources),
+            "xss": XSSDetector(llm_orchestrator, excerpt_sources),
+            "ssrf": SSRFDetector(llm_orchestrator, excerpt_sources)
+        }
+        self.prescreen = PatternPrescreen(self.detectors)
+    
+    async def analyze(
+        self,
+        source_code: Union[str, bytes],
+        file_path: str,
+        context: Dict[str, Any],
+        detector_ids: Optional[List[str]] = None,
+        prescreen: Optional[Dict[str, bool]] = None,
+        enrich_findings: bool = False
+    ) -> List[Finding]:
+        """
+        Analyze code with several detectors in one LLM request
+        
+        Args:
+            source_code: Source code to analyze, as text or raw UTF-8 bytes
+            file_path: Path to the source file
+            context: Additional context (language, framework, etc.)
+            detector_ids: Detectors to run (default: all)
+            prescreen: self.prescreen.scan() result for this code, if the
+                       caller already pre-checked it
+            enrich_findings: Also fetch remediation and CVSS for each
+                             finding, starting as soon as its flow arrives
+        
+        Returns:
+            List of vulnerability findings from all detectors
+        """
+        if detector_ids is None:
+            detector_ids = list(self.detectors)
+        
+        # One pass over the source answers every detector's pre-check
+        hits = prescreen if prescreen is not None else self.prescreen.scan(source_code)
+        active = {
+            detector_id: self.detectors[detector_id]
+            for detector_id in detector_ids
+            if hits.get(detector_id, False)
+        }
+        
+        if not active:
+            return []
+        
+        # Only files that need the LLM are decoded
+        source_code = as_text(source_code)
+        
+        # A single candidate needs no tagging; use its own prompt
+        if len(active) == 1:
+            detector = next(iter(active.values()))
+            return await detector.analyze(source_code, file_path, context, prescreen=hits, enrich_findings=enrich_findings)
+        
+        logger.info(f"Analyzing {file_path} for {', '.join(self.VULN_TYPES[d] for d in active)} vulnerabilities")
+        
+        entry_points = list(dict.fromkeys(
+            entry for detector in active.values() for entry in detector.ENTRY_POINTS
+        ))
+        tagged_sinks = [
+            f"[{self.VULN_TYPES[detector_id]}] {sink}"
+            for detector_id, detector in active.items()
+            for sink in detector.DANGEROUS_SINKS
+        ]
+        
+        trace_args = {
+            "source_code": source_code,
+            "entry_points": entry_points,
+            "dangerous_sinks": tagged_sinks,
+            "context": {
+                "file_path": file_path,
+                "vulnerability_type": ", ".join(self.VULN_TYPES[d] for d in active),
+                "vulnerability_types": [self.VULN_TYPES[d] for d in active],
+                "language": context.get("language", "unknown"),
+                "framework": context.get("framework", "unknown")
+            }
+        }
+        
+        # Send only the code around the hits when that drops most of the file
+        if self.excerpt_sources:
+            excerpt_trace_args(trace_args, [
+                matcher
+                for detector in active.values()
+                for matcher in (detector._SINK_MATCHER, detector._ENTRY_MATCHER)
+            ])
+        
+        def route(finding: Dict[str, Any]) -> Optional[Any]:
+            detector_id = self._classify(finding, active)
+            if detector_id is None:
+                logger.debug(f"Dropping untagged data flow in {file_path}: {finding.get('sink', 'unknown')}")
+                return None
+            return active[detector_id]
+        
+        try:
+            if enrich_findings:
+                return await trace_and_enrich(self.llm, file_path, route, **trace_args)
+            analysis_result = await self.llm.trace_data_flow(**trace_args)
+        except Exception as e:
+            logger.error(f"Error analyzing {file_path} for injection vulnerabilities: {str(e)}")
+            return []
+        
+        # Route each flow to the detector for its vulnerability type
+        flows = {detector: [] for detector in active.values()}
+        for finding in analysis_result.findings:
+            detector = route(finding)
+            if detector is not None:
+                flows[detector].append(finding)
+        
+        findings = []
+        for detector, detector_flows in flows.items():
+            if detector_flows:
+                findings.extend(detector._build_findings(replace(analysis_result, findings=detector_flows), file_path))
+        
+        return findings
+    
+    def _classify(self, finding: Dict[str, Any], active: Dict[str, Any]) -> Optional[str]:
+        """Find the detector id a returned data flow belongs to"""
+        vuln_type = str(finding.get("vuln_type", "")).lower()
+        for detector_id in active:
+            if self.VULN_TYPES[detector_id].lower() == vuln_type:
+                return detector_id
+        
+        # Untagged: fall back to the sink the flow ends in
+        sink = str(finding.get("sink", ""))
+        for detector_id, detector in active.items():
+            if f"[{self.VULN_TYPES[detector_id]}]" in sink or detector._SINK_MATCHER.search(sink):
+                return detector_id
+        
+        return None
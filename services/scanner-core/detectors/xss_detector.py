@@ -5,7 +5,13 @@ Detects XSS vulnerabilities including reflected, stored, and DOM-based XSS
 """
 
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
+
+from .excerpts import excerpt_trace_args
+from .flow_flags import FLAG_DOM_SINK, FLAG_DOM_SOURCE, FLAG_STORED, flow_flags
+from .prescreen import MatcherChain, NeedleMatcher, as_text
+from .streaming import trace_and_enrich
+from .types import Finding
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +19,9 @@ logger = logging.getLogger(__name__)
 class XSSDetector:
     """XSS vulnerability detector"""
     
+    # Key of this detector in ScannerCore.detectors and prescreen results
+    DETECTOR_ID = "xss"
+    
     # User input sources
     ENTRY_POINTS = [
         "request.GET",
@@ -47,18 +56,35 @@ class XSSDetector:
         "[innerHTML]"
     ]
     
-    def __init__(self, llm_orchestrator):
+    # Pre-check matchers: each scans the source once for all of its literals
+    _SINK_MATCHER = NeedleMatcher(DANGEROUS_SINKS)
+    _ENTRY_MATCHER = NeedleMatcher(ENTRY_POINTS)
+    _PRECHECK = MatcherChain(_SINK_MATCHER, _ENTRY_MATCHER)
+    
+    def __init__(self, llm_orchestrator, excerpt_sources: bool = True):
         """Initialize XSS detector"""
         self.llm = llm_orchestrator
+        self.excerpt_sources = excerpt_sources
     
-    async def analyze(self, source_code: str, file_path: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def analyze(
+        self,
+        source_code: Union[str, bytes],
+        file_path: str,
+        context: Dict[str, Any],
+        prescreen: Optional[Dict[str, bool]] = None,
+        enrich_findings: bool = False
+    ) -> List[Finding]:
         """
         Analyze code for XSS vulnerabilities
         
         Args:
-            source_code: Source code to analyze
+            source_code: Source code to analyze, as text or raw UTF-8 bytes
             file_path: Path to the source file
             context: Additional context
+            prescreen: PatternPrescreen.scan() result for this code, if the
+                       caller already pre-checked it
+            enrich_findings: Also fetch remediation and CVSS for each
+                             finding, starting as soon as its flow arrives
             
         Returns:
             List of XSS vulnerability findings
@@ -68,67 +94,92 @@ class XSSDetector:
         findings = []
         
         # Quick pre-check
-        has_output = any(sink in source_code for sink in self.DANGEROUS_SINKS)
-        has_input = any(entry in source_code for entry in self.ENTRY_POINTS)
-        
-        if not (has_output and has_input):
+        if not self._passes_precheck(source_code, prescreen):
             return findings
         
         try:
             # Deep analysis with LLM
-            analysis_result = await self.llm.trace_data_flow(
-                source_code=source_code,
-                entry_points=self.ENTRY_POINTS,
-                dangerous_sinks=self.DANGEROUS_SINKS,
-                context={
+            trace_args = {
+                "source_code": as_text(source_code),
+                "entry_points": self.ENTRY_POINTS,
+                "dangerous_sinks": self.DANGEROUS_SINKS,
+                "context": {
                     "file_path": file_path,
                     "vulnerability_type": "Cross-Site Scripting (XSS)",
                     "language": context.get("language", "unknown"),
                     "framework": context.get("framework", "unknown")
                 }
-            )
+            }
+            
+            # Send only the code around the hits when that drops most of the file
+            if self.excerpt_sources:
+                excerpt_trace_args(trace_args, (self._SINK_MATCHER, self._ENTRY_MATCHER))
+            
+            if enrich_findings:
+                return await trace_and_enrich(self.llm, file_path, lambda flow: self, **trace_args)
+            
+            analysis_result = await self.llm.trace_data_flow(**trace_args)
             
-            for finding in analysis_result.findings:
-                if finding.get("exploitable", False):
-                    xss_type = self._determine_xss_type(finding)
-                    
-                    vulnerability = {
-                        "type": f"XSS - {xss_type}",
-                        "severity": finding.get("severity", "high"),
-                        "file_path": file_path,
-                        "source": finding.get("source", "unknown"),
-                        "sink": finding.get("sink", "unknown"),
-                        "flow_path": finding.get("flow_steps", []),
-                        "sanitization": finding.get("sanitization", "none"),
-                        "xss_type": xss_type,
-                        "description": self._generate_description(finding, xss_type),
-                        "attack_vector": finding.get("attack_vector", ""),
-                        "confidence": analysis_result.confidence_score,
-                        "provider": analysis_result.provider.value,
-                        "cwe": self._get_cwe_for_type(xss_type)
-                    }
-                    
-                    findings.append(vulnerability)
-                    logger.warning(f"{xss_type} XSS found in {file_path}")
+            findings = self._build_findings(analysis_result, file_path)
         
         except Exception as e:
             logger.error(f"Error analyzing {file_path} for XSS: {str(e)}")
         
         return findings
     
+    def _passes_precheck(self, source_code: Union[str, bytes], prescreen: Optional[Dict[str, bool]] = None) -> bool:
+        """Check that the code has both an output sink and a user input source"""
+        if prescreen is not None:
+            return prescreen.get(self.DETECTOR_ID, False)
+        return self._PRECHECK.search(source_code)
+    
+    def _build_findings(self, analysis_result, file_path: str) -> List[Finding]:
+        """Build XSS vulnerability findings from the exploitable data flows of an analysis"""
+        return [
+            self._build_finding(finding, file_path, analysis_result.confidence_score, analysis_result.provider.value)
+            for finding in analysis_result.findings
+            if finding.get("exploitable", False)
+        ]
+    
+    def _build_finding(self, finding: Dict[str, Any], file_path: str, confidence: float = 0.0, provider: str = "") -> Finding:
+        """
+        Build the XSS finding for one exploitable data flow
+        
+        Streamed flows are built before the analysis completes; their
+        confidence and provider are filled in afterwards.
+        """
+        xss_type = self._determine_xss_type(finding)
+        
+        vulnerability = Finding(
+            type=f"XSS - {xss_type}",
+            severity=finding.get("severity", "high"),
+            file_path=file_path,
+            source=finding.get("source", "unknown"),
+            sink=finding.get("sink", "unknown"),
+            flow_path=finding.get("flow_steps", []),
+            sanitization=finding.get("sanitization", "none"),
+            xss_type=xss_type,
+            description=self._generate_description(finding, xss_type),
+            attack_vector=finding.get("attack_vector", ""),
+            confidence=confidence,
+            provider=provider,
+            cwe=self._get_cwe_for_type(xss_type)
+        )
+        
+        logger.warning(f"{xss_type} XSS found in {file_path}")
+        return vulnerability
+    
     def _determine_xss_type(self, finding: Dict[str, Any]) -> str:
         """Determine type of XSS (Reflected, Stored, DOM-based)"""
         sink = finding.get("sink", "").lower()
         source = finding.get("source", "").lower()
         
         # DOM-based XSS indicators
-        if any(x in sink for x in ["innerhtml", "outerhtml", "document.write"]):
-            if any(x in source for x in ["document.location", "window.location", "document.url"]):
-                return "DOM-based"
+        if flow_flags(sink, FLAG_DOM_SINK) and flow_flags(source, FLAG_DOM_SOURCE):
+            return "DOM-based"
         
         # Check if data is stored (database, file, etc.)
-        flow_steps = finding.get("flow_steps", [])
-        if any("database" in step.lower() or "save" in step.lower() for step in flow_steps):
+        if flow_flags("\n".join(finding.get("flow_steps", [])).lower(), FLAG_STORED):
             return "Stored"
         
         # Default to Reflected if coming from HTTP request
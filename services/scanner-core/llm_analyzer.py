@@ -5,37 +5,267 @@ Integrates with multiple LLM providers (OpenAI, Anthropic, Gemini)
 for advanced security analysis
 """
 
-import json
 import re
-from typing import Dict, Any, List, Optional
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Pattern, Tuple, Union
 import asyncio
+import hashlib
 import logging
+import random
+import time
+from collections import Counter, OrderedDict
+from dataclasses import asdict, dataclass
 from pathlib import Path
 import sys
 
+import orjson
+
 # Add libs to path for scanner exceptions
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'libs'))
 from scanner_exceptions import APIError
 
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CACHE_TTL = 24 * 3600  # One day
+
+# Responses are only reused when sampling is close to deterministic
+MAX_CACHEABLE_TEMPERATURE = 0.2
+
+# Markdown code fences anywhere in a response
+_FENCE_RE = re.compile(r'```(?:json)?\s*')
+
+# Tokens found in code worth an LLM review; code with none of them (data
+# classes, constants, generated code) is not sent
+_SUSPECT_RE = re.compile(
+    r'\b(exec|eval|system|popen|subprocess|query|execute|raw|innerHTML|document\.write|fetch|requests\.|urlopen'
+    r'|pickle\.loads|yaml\.load|deserialize|md5|sha1|password|api_key|secret|token)\b',
+    re.I
+)
+
+
+# Attempts per request when the provider answers with a rate limit error
+RATE_LIMIT_ATTEMPTS = 3
+
+# First backoff in seconds after a rate limit error without retry-after;
+# doubled on every further attempt
+RATE_LIMIT_BACKOFF = 1.0
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """Check whether a provider SDK error is a rate limit (HTTP 429) response"""
+    return (
+        type(error).__name__ == 'RateLimitError'
+        or getattr(error, 'status_code', None) == 429
+        or getattr(error, 'code', None) == 429
+    )
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the provider asked to wait, from the error's retry-after header"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(slots=True)
+class UsageStats:
+    """LLM usage counters of an LLMAnalyzer"""
+    total_requests: int = 0
+    total_tokens: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+
+
+class _TokenBucket:
+    """Spaces requests to a steady rate, allowing bursts up to the rate"""
+    
+    __slots__ = ('rate', 'capacity', '_tokens', '_updated', '_lock')
+    
+    def __init__(self, rate: float):
+        """
+        Initialize bucket
+        
+        Args:
+            rate: Requests per second
+        """
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        # The lock queues waiters, so they are served in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _JsonObjectEnd:
+    """
+    Finds where the first top-level JSON object of streamed text closes
+    
+    Braces inside JSON strings are ignored, so evidence snippets such as
+    "{id}" do not end the object early.
+    """
+    
+    __slots__ = ('_depth', '_in_string', '_escape')
+    
+    def __init__(self):
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+    
+    def feed(self, text: str) -> int:
+        """
+        Consume the next piece of text
+        
+        Returns:
+            Offset in text just past the closing brace, or -1 while the
+            object is still open
+        """
+        for index, char in enumerate(text):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = self._depth > 0
+            elif char == '{':
+                self._depth += 1
+            elif char == '}' and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    return index + 1
+        return -1
+
+
+class MemoryResponseCache:
+    """In-memory LRU cache of LLM responses with expiry"""
+    
+    def __init__(self, max_entries: int = 1024, ttl: float = DEFAULT_CACHE_TTL):
+        """
+        Initialize response cache
+        
+        Args:
+            max_entries: Responses kept before the least recently used is dropped
+            ttl: Seconds before a cached response expires
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response, or None on miss/expiry"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: str):
+        """Store a response"""
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Remove all cached responses"""
+        self._entries.clear()
+
 
 class LLMAnalyzer:
     """Analyze code and web responses using LLM for vulnerability detection"""
     
-    def __init__(self, api_key_manager, provider='openai'):
+    __slots__ = (
+        'api_keys', 'provider', 'temperature', 'suspect_pattern', 'cache',
+        'max_concurrent_requests', 'requests_per_second', 'usage_stats',
+        '_clients', '_http_client', '_loop', '_request_slots', '_bucket'
+    )
+    
+    # Model each provider is asked first
+    MODELS = {
+        'openai': 'gpt-4',
+        'gemini': 'gemini-2.0-flash',
+        'claude': 'claude-3-sonnet-20240229'
+    }
+    
+    def __init__(
+        self,
+        api_key_manager,
+        provider='openai',
+        cache=None,
+        temperature: float = 0.1,
+        suspect_pattern: Union[str, Pattern[str], None, bool] = None,
+        max_concurrent_requests: int = 20,
+        requests_per_second: float = 20.0
+    ):
         """
         Initialize LLM analyzer
         
         Args:
             api_key_manager: API key manager instance
             provider: LLM provider (openai, gemini, claude)
+            cache: Response cache; any object with get(key) -> Optional[str]
+                   and set(key, value), e.g. a Redis client created with
+                   decode_responses=True (default: MemoryResponseCache,
+                   False to disable)
+            temperature: Sampling temperature; responses are cached only up
+                         to MAX_CACHEABLE_TEMPERATURE
+            suspect_pattern: Regex code must match to be sent for analysis
+                             (default: _SUSPECT_RE, False to analyze all code)
+            max_concurrent_requests: Provider requests allowed in flight
+            requests_per_second: Rate provider requests are sent at most
         """
         self.api_keys = api_key_manager
         self.provider = provider
-        self.usage_stats = {
-            'total_requests': 0,
-            'total_tokens': 0,
-            'errors': 0
-        }
+        self.temperature = temperature
+        if suspect_pattern is None:
+            suspect_pattern = _SUSPECT_RE
+        elif isinstance(suspect_pattern, str):
+            suspect_pattern = re.compile(suspect_pattern, re.I)
+        self.suspect_pattern = suspect_pattern or None
+        if cache is None:
+            cache = MemoryResponseCache()
+        self.cache = cache if cache is not False and temperature <= MAX_CACHEABLE_TEMPERATURE else None
+        self.max_concurrent_requests = max_concurrent_requests
+        self.requests_per_second = requests_per_second
+        self.usage_stats = UsageStats()
+        
+        # SDK clients by name, with the API key each was built for, so their
+        # connection pools are reused across requests
+        self._clients: Dict[str, Tuple[str, Any]] = {}
+        
+        # HTTP/2 connection pool shared by the OpenAI and Anthropic clients
+        self._http_client = None
+        
+        # Request limits; like the clients, they belong to the event loop
+        # they were created in (see _bind_loop)
+        self._loop = None
+        self._request_slots: Optional[asyncio.Semaphore] = None
+        self._bucket: Optional[_TokenBucket] = None
     
     async def analyze_code(self, code: str, file_path: str, language: str = 'python') -> List[Dict[str, Any]]:
         """
@@ -49,8 +279,8 @@ class LLMAnalyzer:
         Returns:
             List of vulnerability findings
         """
-        # Skip if code is too short
-        if len(code.strip()) < 50:
+        # Skip if code is too short or has nothing worth a review
+        if len(code.strip()) < 50 or not self._is_suspect(code):
             return []
         
         # Truncate if too long (to avoid token limits)
@@ -61,18 +291,115 @@ class LLMAnalyzer:
         prompt = self._build_code_analysis_prompt(code, file_path, language)
         
         try:
-            response = await self._call_llm(prompt)
+            response = await self._call_llm(prompt, cache_key=self._code_cache_key(code, language))
             vulnerabilities = self._parse_vulnerabilities_from_response(response, file_path)
             
-            self.usage_stats['total_requests'] += 1
+            self.usage_stats.total_requests += 1
             
             return vulnerabilities
             
         except Exception as e:
-            self.usage_stats['errors'] += 1
+            self.usage_stats.errors += 1
             print(f"[LLM Error] {str(e)}")
             return []
     
+    async def analyze_code_batch(self, files: List[Tuple[str, str, str]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Analyze several small files in a single LLM request
+        
+        Args:
+            files: (file_path, code, language) tuples
+            
+        Returns:
+            Vulnerability findings per file path
+        """
+        # Skip files whose code is too short or unsuspicious, as analyze_code does
+        files = [
+            (file_path, code, language)
+            for file_path, code, language in files
+            if len(code.strip()) >= 50 and self._is_suspect(code)
+        ]
+        results = {file_path: [] for file_path, _, _ in files}
+        
+        # Truncate if too long (to avoid token limits)
+        max_code_length = 4000
+        files = [
+            (file_path, code if len(code) <= max_code_length else code[:max_code_length] + "\n... (truncated)", language)
+            for file_path, code, language in files
+        ]
+        
+        # Files analyzed before, alone or in another batch, come from the
+        # same per-file cache analyze_code uses
+        if self.cache is not None:
+            uncached = []
+            for file_path, code, language in files:
+                cached = self.cache.get(self._code_cache_key(code, language))
+                if cached is None:
+                    uncached.append((file_path, code, language))
+                    continue
+                self.usage_stats.cache_hits += 1
+                results[file_path] = self._parse_vulnerabilities_from_response(cached, file_path)
+            files = uncached
+        
+        if len(files) == 1:
+            file_path, code, language = files[0]
+            results[file_path] = await self.analyze_code(code, file_path, language)
+            return results
+        if not files:
+            return results
+        
+        prompt = self._build_batch_analysis_prompt(files)
+        
+        try:
+            response = await self._call_llm(prompt)
+            vulnerabilities = self._parse_vulnerabilities_from_response(response, '')
+            
+            self.usage_stats.total_requests += 1
+            
+        except Exception as e:
+            self.usage_stats.errors += 1
+            print(f"[LLM Error] {str(e)}")
+            return results
+        
+        # Route each finding back to its file; fall back to the file name
+        # in case the model shortened the path, unless several files in the
+        # batch share it (__init__.py, index.js, ...)
+        batch_paths = {file_path for file_path, _, _ in files}
+        names = Counter(Path(file_path).name for file_path in batch_paths)
+        by_name = {Path(file_path).name: file_path for file_path in batch_paths if names[Path(file_path).name] == 1}
+        unrouted = 0
+        for vuln in vulnerabilities:
+            reported = str(vuln.get('file', ''))
+            file_path = reported if reported in batch_paths else by_name.get(Path(reported).name)
+            if file_path is None:
+                unrouted += 1
+                continue
+            
+            vuln['file'] = file_path
+            vuln['context'] = file_path
+            results[file_path].append(vuln)
+        
+        if unrouted:
+            # The dropped findings may belong to any file left without
+            # findings, so those are analyzed again on their own; nothing
+            # from this response is cached
+            unattributed = [item for item in files if not results[item[0]]]
+            single = await asyncio.gather(*(
+                self.analyze_code(code, file_path, language)
+                for file_path, code, language in unattributed
+            ))
+            for (file_path, _, _), findings in zip(unattributed, single):
+                results[file_path] = findings
+        elif self.cache is not None:
+            # Cache each file's share of the response under its content key
+            for file_path, code, language in files:
+                self.cache.set(
+                    self._code_cache_key(code, language),
+                    orjson.dumps({'vulnerabilities': results[file_path]}).decode()
+                )
+        
+        return results
+    
     async def analyze_web_response(self, url: str, method: str, response_data: Dict) -> List[Dict[str, Any]]:
         """
         Analyze HTTP response for security issues
@@ -91,15 +418,19 @@ class LLMAnalyzer:
             response = await self._call_llm(prompt)
             vulnerabilities = self._parse_vulnerabilities_from_response(response, url)
             
-            self.usage_stats['total_requests'] += 1
+            self.usage_stats.total_requests += 1
             
             return vulnerabilities
             
         except Exception as e:
-            self.usage_stats['errors'] += 1
+            self.usage_stats.errors += 1
             print(f"[LLM Error] {str(e)}")
             return []
     
+    def _is_suspect(self, code: str) -> bool:
+        """Check whether code has any token worth an LLM review"""
+        return self.suspect_pattern is None or self.suspect_pattern.search(code) is not None
+    
     def _build_code_analysis_prompt(self, code: str, file_path: str, language: str) -> str:
         """Build prompt for code analysis"""
         return f"""You are an expert security auditor. Analyze this code for vulnerabilities.
@@ -137,6 +468,47 @@ Respond ONLY with valid JSON in this exact format (no markdown, no extra text):
   ]
 }}
 
+If no vulnerabilities found, return: {{"vulnerabilities": []}}
+"""
+    
+    def _build_batch_analysis_prompt(self, files: List[Tuple[str, str, str]]) -> str:
+        """Build prompt for analyzing several files at once"""
+        blocks = "\n\n".join(
+            f"=== FILE: {file_path} ({language}) ===\n```{language}\n{code}\n```"
+            for file_path, code, language in files
+        )
+        
+        return f"""You are an expert security auditor. Analyze each of these files for vulnerabilities.
+
+{blocks}
+
+Find security vulnerabilities including but not limited to:
+- SQL Injection
+- Cross-Site Scripting (XSS)
+- Remote Code Execution (RCE)
+- Path Traversal
+- Insecure Deserialization
+- Authentication/Authorization flaws
+- Hardcoded secrets (API keys, passwords)
+- Insecure cryptography
+- SSRF (Server-Side Request Forgery)
+
+Respond ONLY with valid JSON in this exact format (no markdown, no extra text).
+Set "file" to the exact path from the FILE header the finding belongs to:
+{{
+  "vulnerabilities": [
+    {{
+      "file": "src/app.py",
+      "type": "sqli",
+      "severity": "high",
+      "line": 42,
+      "description": "SQL injection vulnerability due to unsanitized user input",
+      "evidence": "query = 'SELECT * FROM users WHERE id=' + user_id",
+      "remediation": "Use parameterized queries or ORM"
+    }}
+  ]
+}}
+
 If no vulnerabilities found, return: {{"vulnerabilities": []}}
 """
     
@@ -153,7 +525,7 @@ Method: {method}
 Status: {status}
 
 Response Headers:
-{json.dumps(headers, indent=2)}
+{orjson.dumps(headers, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()}
 
 Response Body (preview):
 {body_preview}
@@ -182,21 +554,206 @@ Respond ONLY with valid JSON (no markdown):
 If no vulnerabilities: {{"vulnerabilities": []}}
 """
     
-    async def _call_llm(self, prompt: str) -> str:
-        """Call LLM API based on provider"""
+    def _cache_key(self, *parts: str) -> str:
+        """Build a response cache key for this provider and model"""
+        model = self.MODELS.get(self.provider, '')
+        return hashlib.sha256('|'.join((self.provider, model) + parts).encode('utf-8')).hexdigest()
+    
+    def _code_cache_key(self, code: str, language: str) -> str:
+        """
+        Build the response cache key of a code analysis
+        
+        Keyed on the code rather than the prompt, so identical files at
+        different paths, analyzed alone or in a batch, share one response.
+        """
+        return self._cache_key('code', language, hashlib.sha256(code.encode('utf-8')).hexdigest())
+    
+    async def _call_llm(self, prompt: str, cache_key: Optional[str] = None, json_response: bool = True) -> str:
+        """
+        Call LLM API based on provider, reusing cached responses
+        
+        Args:
+            prompt: Prompt to send
+            cache_key: Response cache key (default: derived from the prompt)
+            json_response: The prompt asks for a JSON object; streamed
+                           responses stop as soon as it is complete
+        
+        Returns:
+            Response text
+        """
+        if self.cache is not None:
+            if cache_key is None:
+                cache_key = self._cache_key('prompt', prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.usage_stats.cache_hits += 1
+                return cached
+        
+        self._bind_loop()
         if self.provider == 'openai':
-            return await self._call_openai(prompt)
+            content = await self._call_openai(prompt, json_response)
         elif self.provider == 'gemini':
-            return await self._call_gemini(prompt)
+            content = await self._call_gemini(prompt)
         elif self.provider == 'claude':
-            return await self._call_claude(prompt)
+            content = await self._call_claude(prompt, json_response)
         else:
             raise ValueError(f"Unknown provider: {self.provider}")
     
-    async def _call_openai(self, prompt: str) ->str:
+        if self.cache is not None and content:
+            self.cache.set(cache_key, content)
+        return content
+    
+    def _get_client(self, name: str, api_key: str, factory: Callable[[], Any]) -> Any:
+        """
+        Return the cached SDK client for a provider, building it on first use
+        
+        Args:
+            name: Client name (provider, or a variant such as 'gemini_no_ssl')
+            api_key: API key the client must use; a changed key rebuilds it
+            factory: Builds a new client
+        
+        Returns:
+            SDK client
+        """
+        cached = self._clients.get(name)
+        if cached is not None and cached[0] == api_key:
+            return cached[1]
+        
+        client = factory()
+        self._clients[name] = (api_key, client)
+        return client
+    
+    def _get_http_client(self):
+        """
+        Return the shared HTTP client, creating it on first use
+        
+        The SDKs' default pools hold about 10-20 connections, fewer than a
+        concurrent scan has requests in flight; HTTP/2 lets those requests
+        share a few connections per provider.
+        """
+        if self._http_client is None:
+            import httpx
+            
+            self._http_client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+                timeout=httpx.Timeout(connect=5.0, read=120.0, write=30.0, pool=5.0)
+            )
+        return self._http_client
+    
+    async def close(self):
+        """Close the shared HTTP connection pool and drop the SDK clients"""
+        self._clients.clear()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+    
+    def _bind_loop(self):
+        """
+        Create the request limits for the running event loop
+        
+        Callers such as the GUI run each scan in a new event loop. The
+        limits and the HTTP connection pool cannot be used outside the
+        loop they were created in, so a new loop gets new ones.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        
+        self._loop = loop
+        self._request_slots = asyncio.Semaphore(self.max_concurrent_requests)
+        self._bucket = _TokenBucket(self.requests_per_second)
+        self._clients.clear()
+        self._http_client = None
+    
+    async def _send(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Send one provider request within the rate limits
+        
+        A rate limit error is retried after the provider's retry-after, or
+        an exponential backoff, plus jitter so waiting requests do not all
+        return at once.
+        
+        Args:
+            request: Starts the request; called again for each retry
+        
+        Returns:
+            The request's result
+        """
+        for attempt in range(RATE_LIMIT_ATTEMPTS):
+            async with self._request_slots:
+                await self._bucket.acquire()
+                try:
+                    return await request()
+                except Exception as e:
+                    if not _is_rate_limited(e) or attempt == RATE_LIMIT_ATTEMPTS - 1:
+                        raise
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = RATE_LIMIT_BACKOFF * 2 ** attempt
+            
+            # Wait outside the request slot, so it is not held idle
+            delay += random.uniform(0, 0.5)
+            logger.warning(f"{self.provider} rate limit reached, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+    
+    async def _read_stream(self, chunks, stop_at_json_end: bool) -> str:
+        """
+        Collect streamed response text
+        
+        Args:
+            chunks: Async iterator of text pieces
+            stop_at_json_end: Stop reading once the first JSON object closes;
+                              a response that never closes one is read in full
+        
+        Returns:
+            Response text
+        """
+        json_end = _JsonObjectEnd() if stop_at_json_end else None
+        parts = []
+        async for text in chunks:
+            if not text:
+                continue
+            if json_end is not None:
+                end = json_end.feed(text)
+                if end >= 0:
+                    parts.append(text[:end])
+                    break
+            parts.append(text)
+        return ''.join(parts)
+    
+    async def _openai_completion(self, client, model: str, prompt: str, stop_at_json_end: bool) -> str:
+        """Stream one chat completion, counting its tokens when usage arrives"""
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "You are a security expert. Respond only with valid JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=self.temperature,
+            max_tokens=2000,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        
+        async def texts():
+            async for chunk in stream:
+                # Usage comes in a final chunk without choices, which an
+                # early stop skips
+                if chunk.usage is not None:
+                    self.usage_stats.total_tokens += chunk.usage.total_tokens
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content
+        
+        try:
+            return await self._read_stream(texts(), stop_at_json_end)
+        finally:
+            await stream.close()
+    
+    async def _call_openai(self, prompt: str, stop_at_json_end: bool = False) -> str:
         """Call OpenAI API"""
         try:
-            from openai import OpenAI
+            from openai import AsyncOpenAI, BadRequestError, NotFoundError, PermissionDeniedError
         except ImportError:
             raise ImportError("openai package not installed. Run: pip install openai")
         
@@ -204,44 +761,25 @@ If no vulnerabilities: {{"vulnerabilities": []}}
         if not api_key:
             raise ValueError("OpenAI API key not configured")
         
-        client = OpenAI(api_key=api_key)
+        client = self._get_client('openai', api_key, lambda: AsyncOpenAI(api_key=api_key, http_client=self._get_http_client()))
         
         try:
-            response = await asyncio.to_thread(
-                client.chat.completions.create,
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a security expert. Respond only with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=2000
+            return await self._send(
+                lambda: self._openai_completion(client, self.MODELS['openai'], prompt, stop_at_json_end)
             )
             
-            content = response.choices[0].message.content
-            self.usage_stats['total_tokens'] += response.usage.total_tokens
-            
-            return content
+        except (NotFoundError, PermissionDeniedError, BadRequestError) as e:
+            # Fallback to gpt-3.5-turbo if gpt-4 is not available to this
+            # key; other errors (auth, rate limit, network) would fail the
+            # same way on any model
+            if isinstance(e, BadRequestError) and 'model' not in str(e).lower():
+                raise
             
-        except Exception as e:
-            # Fallback to gpt-3.5-turbo if gpt-4 fails
             try:
-                response = await asyncio.to_thread(
-                    client.chat.completions.create,
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a security expert. Respond only with valid JSON."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.1,
-                    max_tokens=2000
+                return await self._send(
+                    lambda: self._openai_completion(client, "gpt-3.5-turbo", prompt, stop_at_json_end)
                 )
-                
-                content = response.choices[0].message.content
-                self.usage_stats['total_tokens'] += response.usage.total_tokens
-                
-                return content
-            except:
+            except Exception:
                 raise e
     
     async def _call_gemini(self, prompt: str) -> str:
@@ -256,18 +794,18 @@ If no vulnerabilities: {{"vulnerabilities": []}}
             raise APIError("API_KEY_MISSING", "Gemini API key not configured")
         
         # NEW SDK: Use Client-based API
-        client = genai.Client(api_key=api_key)
-        
-        async def _do_generate():
-            return await asyncio.to_thread(
-                client.models.generate_content,
-                model='gemini-2.0-flash',  # Use stable flash model
-                contents=prompt
-            )
+        client = self._get_client('gemini', api_key, lambda: genai.Client(api_key=api_key))
         
         try:
             # Increased timeout to 120s for complex analysis
-            response = await asyncio.wait_for(_do_generate(), timeout=120.0)
+            response = await self._send(lambda: asyncio.wait_for(
+                client.aio.models.generate_content(
+                    model=self.MODELS['gemini'],  # Use stable flash model
+                    contents=prompt,
+                    config={'temperature': self.temperature}
+                ),
+                timeout=120.0
+            ))
             return response.text
         except asyncio.TimeoutError:
             raise APIError("API_TIMEOUT", "Gemini API request timed out after 120 seconds")
@@ -277,19 +815,20 @@ If no vulnerabilities: {{"vulnerabilities": []}}
             # SSL error - retry with ssl verification disabled
             if "ssl" in error_str or "record layer" in error_str or "certificate" in error_str:
                 try:
-                    import ssl
-                    import httpx
-                    # Create client with SSL verification disabled
-                    http_client = httpx.Client(verify=False)
-                    client_no_ssl = genai.Client(api_key=api_key, http_client=http_client)
-                    response = await asyncio.wait_for(
-                        asyncio.to_thread(
-                            client_no_ssl.models.generate_content,
-                            model='gemini-2.0-flash',
-                            contents=prompt
+                    # Client with SSL verification disabled
+                    client_no_ssl = self._get_client(
+                        'gemini_no_ssl',
+                        api_key,
+                        lambda: genai.Client(api_key=api_key, http_options={'async_client_args': {'verify': False}})
+                    )
+                    response = await self._send(lambda: asyncio.wait_for(
+                        client_no_ssl.aio.models.generate_content(
+                            model=self.MODELS['gemini'],
+                            contents=prompt,
+                            config={'temperature': self.temperature}
                         ),
                         timeout=120.0
-                    )
+                    ))
                     return response.text
                 except Exception as ssl_e:
                     raise APIError("API_ERROR", f"Gemini SSL error (retry failed): {str(ssl_e)}")
@@ -310,7 +849,7 @@ If no vulnerabilities: {{"vulnerabilities": []}}
             else:
                 raise APIError("API_ERROR", f"Gemini API error: {str(e)}")
     
-    async def _call_claude(self, prompt: str) -> str:
+    async def _call_claude(self, prompt: str, stop_at_json_end: bool = False) -> str:
         """Call Anthropic Claude API"""
         try:
             import anthropic
@@ -321,28 +860,35 @@ If no vulnerabilities: {{"vulnerabilities": []}}
         if not api_key:
             raise ValueError("Claude API key not configured")
         
-        client = anthropic.Anthropic(api_key=api_key)
+        client = self._get_client('claude', api_key, lambda: anthropic.AsyncAnthropic(api_key=api_key, http_client=self._get_http_client()))
         
-        response = await asyncio.to_thread(
-            client.messages.create,
-            model="claude-3-sonnet-20240229",
-            max_tokens=2000,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
+        async def request():
+            async with client.messages.stream(
+                model=self.MODELS['claude'],
+                max_tokens=2000,
+                temperature=self.temperature,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            ) as stream:
+                return await self._read_stream(stream.text_stream, stop_at_json_end)
         
-        return response.content[0].text
+        return await self._send(request)
     
     def _parse_vulnerabilities_from_response(self, response: str, context: str) -> List[Dict[str, Any]]:
         """Parse vulnerability findings from LLM response"""
-        # Remove markdown code blocks if present
-        response = re.sub(r'```json\s*', '', response)
-        response = re.sub(r'```\s*', '', response)
+        # Usually the JSON is bare or wrapped in one code block; strip the
+        # fences at the ends before falling back to removing all of them
         response = response.strip()
+        try:
+            data = orjson.loads(response.removeprefix('```json').removeprefix('```').removesuffix('```'))
+        except orjson.JSONDecodeError:
+            response = _FENCE_RE.sub('', response).strip()
+            data = None
         
         try:
-            data = json.loads(response)
+            if data is None:
+                data = orjson.loads(response)
             vulnerabilities = data.get('vulnerabilities', [])
             
             # Add context to each finding
@@ -358,7 +904,7 @@ If no vulnerabilities: {{"vulnerabilities": []}}
             
             return vulnerabilities
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             print(f"[LLM] Failed to parse JSON response: {e}")
             print(f"[LLM] Response was: {response[:200]}")
             return []
@@ -386,13 +932,13 @@ If no vulnerabilities: {{"vulnerabilities": []}}
             >>> print(response)
         """
         try:
-            response = await self._call_llm(prompt)
-            self.usage_stats['total_requests'] += 1
+            response = await self._call_llm(prompt, json_response=False)
+            self.usage_stats.total_requests += 1
             return response
         except Exception as e:
-            self.usage_stats['errors'] += 1
+            self.usage_stats.errors += 1
             raise Exception(f"LLM chat failed: {str(e)}")
     
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get LLM usage statistics"""
-        return self.usage_stats.copy()
+        return asdict(self.usage_stats)
@@ -6,17 +6,47 @@ Orchestrates vulnerability detection across multiple detectors
 
 import logging
 import asyncio
-from typing import Dict, List, Any, Optional
+import hashlib
+import mmap
+import os
+from contextlib import aclosing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple, Union
 from pathlib import Path
 from datetime import datetime
 
 from services.llm_orchestrator import create_orchestrator
+from .llm_analyzer import LLMAnalyzer
 from .detectors.injection_detector import SQLInjectionDetector
 from .detectors.xss_detector import XSSDetector
 from .detectors.ssrf_detector import SSRFDetector
+from .detectors.unified_detector import UnifiedInjectionDetector
+from .detectors.types import Finding
+from .detectors.prescreen import init_worker, prescreen_path
 
 logger = logging.getLogger(__name__)
 
+# Scans with fewer files pre-check them in-process; starting the worker
+# pool costs more than it saves
+PRESCREEN_POOL_MIN_FILES = 256
+
+# Files read ahead of the scan workers
+FILE_QUEUE_SIZE = 128
+
+# File extension -> language name
+_LANG_MAP = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.java': 'java',
+    '.php': 'php',
+    '.rb': 'ruby',
+    '.go': 'go',
+    '.cs': 'csharp',
+    '.cpp': 'cpp'
+}
+
 
 class ScannerCore:
     """Main scanner engine coordinating all detectors"""
@@ -30,6 +60,25 @@ class ScannerCore:
         """
         self.config = config
         
+        # Files at least this large are mapped instead of read into memory
+        self.mmap_threshold = config.get('mmap_threshold', 1024 * 1024)
+        
+        # Files larger than this many bytes are skipped (None: no limit)
+        self.max_file_size = config.get('max_file_size')
+        
+        # Worker processes for the detector pre-checks of large scans
+        self.prescreen_workers = config.get('prescreen_workers', os.cpu_count() or 1)
+        self._prescreen_pool: Optional[ProcessPoolExecutor] = None
+        
+        # Files whose detectors run at once; their LLM requests overlap
+        self.max_concurrent_files = config.get('max_concurrent_files', 16)
+        
+        # Fetch remediation and CVSS for data flow findings during the scan
+        self.enrich_findings = config.get('enrich_findings', False)
+        
+        # Send large files to the LLM as excerpts around the pre-check hits
+        excerpt_sources = config.get('excerpt_sources', True)
+        
         # Get LLM config
         llm_config = config.get('llm', {})
         api_key_manager = llm_config.get('api_key_manager')
@@ -42,14 +91,6 @@ class ScannerCore:
         
         # Create LLMAnalyzer (not orchestrator!)
         if api_key_manager:
-            # Import LLMAnalyzer
-            import sys
-            from pathlib import Path
-            scanner_core_dir = Path(__file__).parent
-            if str(scanner_core_dir) not in sys.path:
-                sys.path.insert(0, str(scanner_core_dir))
-            from llm_analyzer import LLMAnalyzer
-            
             self.llm = LLMAnalyzer(api_key_manager, provider)
             logger.info(f"LLMAnalyzer initialized with provider: {provider}")
             print(f"[Scanner] LLMAnalyzer created with provider: {provider}")
@@ -61,12 +102,15 @@ class ScannerCore:
         detectors_config = {}
         if self.llm:
             detectors_config = {
-                'sqli': SQLInjectionDetector(self.llm),
-                'xss': XSSDetector(self.llm),
-                'ssrf': SSRFDetector(self.llm)
+                'sqli': SQLInjectionDetector(self.llm, excerpt_sources),
+                'xss': XSSDetector(self.llm, excerpt_sources),
+                'ssrf': SSRFDetector(self.llm, excerpt_sources)
             }
         self.detectors = detectors_config
         
+        # Data flow detectors enabled together share one LLM request per file
+        self.unified_detector = UnifiedInjectionDetector(self.llm, self.detectors, excerpt_sources) if self.llm else None
+        
         logger.info(f"Scanner initialized with {len(self.detectors)} detectors")
     
     async def scan(
@@ -120,7 +164,10 @@ class ScannerCore:
         
         # Run web scan
         logger.info(f"Detected web target: {url}")
-        findings = await web_scanner.scan_url(url, modules or ['all'])
+        try:
+            findings = await web_scanner.scan_url(url, modules or ['all'])
+        finally:
+            await web_scanner.close()
         
         # Format results
         end_time = datetime.utcnow()
@@ -162,33 +209,18 @@ class ScannerCore:
         logger.info(f"Starting scan of project: {project_path}")
         
         scan_config = scan_config or {}
-        enabled_detectors = scan_config.get('detectors', list(self.detectors.keys()))
         
-        # Discover source files
-        files_to_scan = self._discover_files(project_path, scan_config)
-        logger.info(f"Found {len(files_to_scan)} files to scan")
-        
-        # Scan all files
-        all_findings = []
-        file_count = 0
-        
-        for file_info in files_to_scan:
-            file_findings = await self._scan_file(
-                file_info['path'],
-                file_info['content'],
-                file_info['context'],
-                enabled_detectors
-            )
-            
-            all_findings.extend(file_findings)
-            file_count += 1
-            
-            if file_count % 10 == 0:
-                logger.info(f"Scanned {file_count}/{len(files_to_scan)} files...")
+        # Findings keep the discovery order of their files
+        file_findings: Dict[int, List[Finding]] = {}
+        async for index, findings in self._scan_files(project_path, scan_config):
+            file_findings[index] = findings
+        file_count = len(file_findings)
+        all_findings = [finding for index in sorted(file_findings) for finding in file_findings[index]]
         
         # Generate results summary
         end_time = datetime.utcnow()
         duration = (end_time - start_time).total_seconds()
+        all_findings = [finding.to_dict() for finding in all_findings]
         
         results = {
             'scan_id': scan_config.get('scan_id', 'unknown'),
@@ -208,21 +240,155 @@ class ScannerCore:
         
         return results
     
+    async def scan_project_stream(
+        self,
+        project_path: str,
+        scan_config: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Scan entire project, yielding findings as their files complete
+        
+        Lets a UI or API show results while the scan runs; stopping the
+        iteration cancels the rest of the scan.
+        
+        Args:
+            project_path: Path to project root
+            scan_config: Scan configuration overrides
+            
+        Yields:
+            Finding dicts, as in scan_project()['findings'], in the order
+            their files finish
+        """
+        logger.info(f"Starting streamed scan of project: {project_path}")
+        
+        # aclosing: closing this stream closes the file scan with it, rather
+        # than leaving it to the event loop's generator finalizer
+        async with aclosing(self._scan_files(project_path, scan_config or {})) as scans:
+            async for _, findings in scans:
+                for finding in findings:
+                    yield finding.to_dict()
+    
+    async def _scan_files(
+        self,
+        project_path: str,
+        scan_config: Dict[str, Any]
+    ) -> AsyncIterator[Tuple[int, List[Finding]]]:
+        """
+        Scan the files of a project concurrently
+        
+        Producer/consumer: one task reads files into a bounded queue while
+        max_concurrent_files workers scan them, so disk reads overlap the
+        LLM requests and only a queue's worth of files is held in memory.
+        
+        Args:
+            project_path: Path to project root
+            scan_config: Scan configuration
+            
+        Yields:
+            (index of the file in discovery order, its findings) for each
+            scanned file, as it completes
+        """
+        enabled_detectors = scan_config.get('detectors', list(self.detectors.keys()))
+        
+        # Discover source files; they are read while earlier ones are scanned
+        paths = await asyncio.to_thread(self._discover_paths, project_path, scan_config)
+        logger.info(f"Found {len(paths)} files to scan")
+        
+        prescreen_hits = await self._prescreen_files([str(file_path) for file_path in paths])
+        
+        queue: asyncio.Queue = asyncio.Queue(maxsize=FILE_QUEUE_SIZE)
+        completed: asyncio.Queue = asyncio.Queue()
+        file_count = 0
+        workers = max(1, self.max_concurrent_files)
+        
+        # Files with identical content and language are scanned once; the
+        # others wait for that scan and take over its findings
+        scans_by_content: Dict[Tuple[str, str], asyncio.Future] = {}
+        
+        async def produce():
+            try:
+                async for index, file_info in self._discover_files_stream(paths):
+                    await queue.put((index, file_info))
+            except asyncio.CancelledError:
+                # The workers are cancelled with us and must not be waited
+                # on; the queue may be full
+                raise
+            except Exception as e:
+                logger.error(f"Error reading project files: {str(e)}")
+            for _ in range(workers):
+                await queue.put(None)
+        
+        async def consume():
+            nonlocal file_count
+            try:
+                while (item := await queue.get()) is not None:
+                    index, file_info = item
+                    content_key = (file_info['content_hash'], file_info['context']['language'])
+                    findings = []
+                    
+                    if content_key in scans_by_content:
+                        # Shielded: a cancelled waiter must not cancel the
+                        # future the owner and other waiters share
+                        findings = await asyncio.shield(scans_by_content[content_key])
+                        findings = [replace(finding, file_path=file_info['path']) for finding in findings]
+                    else:
+                        scan = scans_by_content[content_key] = asyncio.get_running_loop().create_future()
+                        try:
+                            findings = await self._scan_file(
+                                file_info['path'],
+                                file_info['content'],
+                                file_info['context'],
+                                enabled_detectors,
+                                prescreen_hits.get(file_info['path'])
+                            )
+                        except Exception as e:
+                            logger.error(f"Error scanning {file_info['path']}: {str(e)}")
+                        finally:
+                            if not scan.done():
+                                scan.set_result(findings)
+                    
+                    completed.put_nowait((index, findings))
+                    file_count += 1
+                    if file_count % 10 == 0:
+                        logger.info(f"Scanned {file_count}/{len(paths)} files...")
+            finally:
+                # One None per worker tells the caller the scan is over
+                completed.put_nowait(None)
+        
+        tasks = [asyncio.create_task(produce())]
+        tasks.extend(asyncio.create_task(consume()) for _ in range(workers))
+        try:
+            remaining = workers
+            while remaining:
+                item = await completed.get()
+                if item is None:
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            # Closing the stream early stops the reader and the workers
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
     async def _scan_file(
         self,
         file_path: str,
-        content: str,
+        content: Union[str, bytes, mmap.mmap],
         context: Dict[str, Any],
-        enabled_detectors: List[str]
-    ) -> List[Dict[str, Any]]:
+        enabled_detectors: List[str],
+        prescreen: Optional[Dict[str, bool]] = None
+    ) -> List[Finding]:
         """
         Scan single file with all enabled detectors
         
         Args:
             file_path: Path to file
-            content: File content
+            content: File content; raw bytes or an mmap are decoded by the
+                     detectors only once their pre-check passes
             context: File context (language, framework)
             enabled_detectors: List of detector IDs to use
+            prescreen: Pre-check result from _prescreen_files, if any
             
         Returns:
             List of findings for this file
@@ -231,10 +397,17 @@ class ScannerCore:
         
         # Run detectors in parallel
         tasks = []
+        unified_ids = []
+        if self.unified_detector:
+            unified_ids = [d for d in enabled_detectors if d in self.unified_detector.VULN_TYPES and d in self.detectors]
+            tasks.append(self.unified_detector.analyze(
+                content, file_path, context, unified_ids, prescreen, enrich_findings=self.enrich_findings
+            ))
+        
         for detector_id in enabled_detectors:
-            if detector_id in self.detectors:
+            if detector_id in self.detectors and detector_id not in unified_ids:
                 detector = self.detectors[detector_id]
-                tasks.append(detector.analyze(content, file_path, context))
+                tasks.append(detector.analyze(content, file_path, context, enrich_findings=self.enrich_findings))
         
         if tasks:
             results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -247,11 +420,55 @@ class ScannerCore:
         
         return findings
     
-    def _discover_files(
+    async def _prescreen_files(self, paths: List[str]) -> Dict[str, Dict[str, bool]]:
+        """
+        Pre-check the files of a large scan on all CPU cores
+        
+        The workers re-read each file (from the page cache) rather than
+        receive its content, which would cost as much to pickle as to scan.
+        
+        Args:
+            paths: Paths of the files to scan
+            
+        Returns:
+            Pre-check result per file path; empty when the scan is too small,
+            the pool is disabled or a worker fails, in which case _scan_file
+            pre-checks in-process
+        """
+        if (self.unified_detector is None or self.prescreen_workers < 2
+                or len(paths) < PRESCREEN_POOL_MIN_FILES):
+            return {}
+        
+        if self._prescreen_pool is None:
+            detector_classes = {
+                detector_id: type(detector)
+                for detector_id, detector in self.unified_detector.detectors.items()
+            }
+            self._prescreen_pool = ProcessPoolExecutor(
+                max_workers=self.prescreen_workers,
+                initializer=init_worker,
+                initargs=(detector_classes,)
+            )
+        
+        loop = asyncio.get_running_loop()
+        
+        try:
+            # Executor.map blocks while collecting, so run it off the event loop
+            results = await loop.run_in_executor(
+                None,
+                lambda: list(self._prescreen_pool.map(prescreen_path, paths, chunksize=64))
+            )
+        except Exception as e:
+            logger.warning(f"Parallel pre-check failed, checking files in-process: {str(e)}")
+            return {}
+        
+        return dict(zip(paths, results))
+    
+    def _discover_paths(
         self,
         project_path: str,
         scan_config: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Path]:
         """
         Discover source files to scan
         
@@ -260,65 +477,99 @@ class ScannerCore:
             scan_config: Scan configuration
             
         Returns:
-            List of file information dicts
+            Paths of the source files, in walk order
         """
-        path = Path(project_path)
-        files = []
+        paths = []
         
         # Supported extensions
-        extensions = scan_config.get('extensions', [
+        extensions = frozenset(scan_config.get('extensions', [
             '.py', '.js', '.ts', '.java', '.php', '.rb', '.go', '.cs', '.cpp'
-        ])
+        ]))
         
         # Excluded directories
-        exclude_dirs = set(scan_config.get('exclude_dirs', [
+        exclude_dirs = frozenset(scan_config.get('exclude_dirs', [
             'node_modules', '.git', '__pycache__', 'venv', 'env', 'dist', 'build'
         ]))
         
-        for file_path in path.rglob('*'):
-            # Skip directories
-            if file_path.is_dir():
-                continue
-            
-            # Skip excluded directories
-            if any(excluded in file_path.parts for excluded in exclude_dirs):
-                continue
-            
-            # Check extension
-            if file_path.suffix not in extensions:
-                continue
+        # Walk with os.scandir so excluded trees are pruned before they are
+        # descended into; DirEntry caches the type, saving a stat per entry
+        pending = [project_path]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in exclude_dirs:
+                                pending.append(entry.path)
+                        elif os.path.splitext(entry.name)[1] in extensions and entry.is_file():
+                            if self.max_file_size is not None and entry.stat().st_size > self.max_file_size:
+                                logger.info(f"Skipping {entry.path}: larger than {self.max_file_size} bytes")
+                                continue
+                            paths.append(Path(entry.path))
+            except OSError as e:
+                logger.warning(f"Cannot list {e.filename}: {e.strerror}")
+        
+        return paths
+    
+    async def _discover_files_stream(self, paths: List[Path]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Read discovered source files one at a time, off the event loop
+        
+        Args:
+            paths: Paths from _discover_paths
             
+        Yields:
+            (index in paths, file information dict); unreadable files are
+            logged and skipped
+        """
+        for index, file_path in enumerate(paths):
             try:
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
-                
-                files.append({
-                    'path': str(file_path),
-                    'content': content,
-                    'context': {
-                        'language': self._detect_language(file_path.suffix),
-                        'size': len(content),
-                        'lines': content.count('\n')
-                    }
-                })
+                content, lines, content_hash = await asyncio.to_thread(self._read_source, file_path)
             except Exception as e:
                 logger.warning(f"Could not read {file_path}: {str(e)}")
+                continue
+            
+            yield index, {
+                'path': str(file_path),
+                'content': content,
+                'content_hash': content_hash,
+                'context': {
+                    'language': _LANG_MAP.get(file_path.suffix, 'unknown'),
+                    'size': len(content),
+                    'lines': lines
+                }
+            }
+    
+    def _read_source(self, file_path: Path) -> Tuple[Union[bytes, mmap.mmap], int, str]:
+        """
+        Load a source file for the detectors without decoding it
+        
+        Most files fail the detector pre-checks and never need decoding.
+        Files of mmap_threshold bytes or more are mapped read-only, so the
+        detectors scan the page cache instead of a private copy.
         
-        return files
+        Args:
+            file_path: Source file
+            
+        Returns:
+            (content, line count, 128-bit BLAKE2b hex digest of the content)
+        """
+        if file_path.stat().st_size < self.mmap_threshold:
+            content = file_path.read_bytes()
+            return content, content.count(b'\n'), hashlib.blake2b(content, digest_size=16).hexdigest()
+        
+        with open(file_path, 'rb') as f:
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        # mmap has no count(); count newlines a chunk at a time
+        lines = 0
+        for offset in range(0, len(content), self.mmap_threshold):
+            lines += content[offset:offset + self.mmap_threshold].count(b'\n')
+        return content, lines, hashlib.blake2b(content, digest_size=16).hexdigest()
     
     def _detect_language(self, extension: str) -> str:
         """Detect programming language from file extension"""
-        lang_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.ts': 'typescript',
-            '.java': 'java',
-            '.php': 'php',
-            '.rb': 'ruby',
-            '.go': 'go',
-            '.cs': 'csharp',
-            '.cpp': 'cpp'
-        }
-        return lang_map.get(extension, 'unknown')
+        return _LANG_MAP.get(extension, 'unknown')
     
     def _count_by_severity(self, findings: List[Dict[str, Any]]) -> Dict[str, int]:
         """Count findings by severity"""
@@ -343,4 +594,8 @@ class ScannerCore:
     
     async def close(self):
         """Cleanup resources"""
-        await self.llm.close()
+        if self._prescreen_pool is not None:
+            self._prescreen_pool.shutdown()
+            self._prescreen_pool = None
+        if self.llm is not None:
+            await self.llm.close()
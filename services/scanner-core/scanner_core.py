@@ -61,7 +61,10 @@ class ScannerCore:
             verify_ssl=self.config.get('verify_ssl', True)  # Default: verify SSL
         )
         
-        self.code_scanner = CodeScanner(self.llm_analyzer)
+        self.code_scanner = CodeScanner(
+            self.llm_analyzer,
+            max_concurrent_files=self.config.get('max_concurrent_files', 16)
+        )
         
         print(f"[Scanner] Initialized with provider: {provider}")
     
@@ -119,6 +122,15 @@ class ScannerCore:
         
         return results
     
+    async def close(self):
+        """
+        Close the connection pools of the web scanner and LLM analyzer
+        
+        Call once the scan is done, in the event loop that ran it.
+        """
+        await self.web_scanner.close()
+        await self.llm_analyzer.close()
+    
     async def _scan_web(self, url: str, modules: Optional[List[str]]) -> List[Dict[str, Any]]:
         """Scan website"""
         try:
@@ -5,23 +5,127 @@ Handles HTTP requests, crawling, and web-specific vulnerability detection
 """
 
 import asyncio
+import hashlib
+import os
 import aiohttp
-from typing import Dict, List, Any, Optional, Set
-from urllib.parse import urljoin, urlparse, parse_qs
-from bs4 import BeautifulSoup
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qs, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+from bs4 import BeautifulSoup, SoupStrainer
+from multidict import CIMultiDict
 import re
 import sys
 from pathlib import Path
 
+try:
+    import lxml  # noqa: F401
+    # libxml2's C parser; much faster than the pure-Python html.parser
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import brotli  # noqa: F401
+    # aiohttp can only decode br responses when brotli is installed
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
 # Import scanner exceptions for pause/resume
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'libs'))
 from scanner_exceptions import APIError, ScanPausedException
 
+# Response bodies are read up to this many bytes; the rest is never downloaded
+MAX_RESPONSE_BYTES = 2_000_000
+
+# Content types whose body is read and scanned; other responses (images,
+# PDFs, archives) only have their headers checked
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml')
+
+# Pages remembered with their ETag/Last-Modified for conditional GETs on
+# later scans, holding at most PAGE_CACHE_MAX_CHARS of HTML in total; least
+# recently fetched pages are dropped first
+PAGE_CACHE_SIZE = 128
+PAGE_CACHE_MAX_CHARS = 8 * 1024 * 1024
+
+# Pages with at least this much HTML are parsed in the worker pool; smaller
+# ones parse faster in-process than the round trip to a worker takes
+PARSE_POOL_MIN_CHARS = 32 * 1024
+
+# Only links and forms (with their inputs) are read from a page's soup, so
+# the rest of the document is never turned into tags
+_PAGE_TAGS = SoupStrainer(['a', 'form'])
+
+# Security headers every page should send -> (finding description, severity)
+SECURITY_HEADERS = {
+    'x-frame-options': ('Missing X-Frame-Options header (Clickjacking risk)', 'medium'),
+    'x-content-type-options': ('Missing X-Content-Type-Options header', 'medium'),
+    'content-security-policy': ('Missing Content-Security-Policy header', 'low'),
+    'strict-transport-security': ('Missing HSTS header (HTTP allowed)', 'medium'),
+    'x-xss-protection': ('Missing X-XSS-Protection header', 'medium'),
+}
+
+# Query parameters that only track the visitor or session; URLs that differ
+# only in these point at the same page
+TRACKING_PARAMS = frozenset({'sessionid', 'phpsessid', 'jsessionid', 'sid', 'gclid', 'fbclid'})
+
+# Digit runs (counters, dates, nonces) ignored when comparing page content
+# (raw bytes) and URL templates (text)
+_VOLATILE_BYTES_RE = re.compile(rb'\d+')
+_VOLATILE_RE = re.compile(r'\d+')
+
+# Links crawled per URL template (path with digit runs masked, plus query
+# parameter names), so pagination, calendars and galleries cannot use up
+# the whole max_pages budget
+PAGES_PER_TEMPLATE = 5
+
+# HTML comments, and the (lowercase) words that make one worth reporting
+_COMMENT_RE = re.compile(r'<!--(.*?)-->', re.DOTALL)
+SENSITIVE_COMMENT_WORDS = ('password', 'api key', 'api_key', 'apikey', 'secret', 'token', 'todo', 'fixme')
+
+
+def _build_comment_automaton():
+    """Aho-Corasick automaton over SENSITIVE_COMMENT_WORDS, or None without pyahocorasick"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word in SENSITIVE_COMMENT_WORDS:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    return automaton
+
+
+_COMMENT_AUTOMATON = _build_comment_automaton()
+
+# Fallback matcher; searching lowercased text is several times faster
+# than a re.IGNORECASE alternation
+_SENSITIVE_COMMENT_RE = re.compile('|'.join(map(re.escape, SENSITIVE_COMMENT_WORDS)))
+
+
+def _is_sensitive_comment(comment: str) -> bool:
+    """Return True if an HTML comment mentions any SENSITIVE_COMMENT_WORDS"""
+    text = comment.lower()
+    if _COMMENT_AUTOMATON is not None:
+        return next(_COMMENT_AUTOMATON.iter(text), None) is not None
+    return _SENSITIVE_COMMENT_RE.search(text) is not None
+
+
+# Form input name/id that marks a CSRF token
+_CSRF_RE = re.compile('csrf', re.IGNORECASE)
+
 
 class WebScanner:
     """Scanner for web applications (URLs)"""
     
-    def __init__(self, llm_analyzer, max_depth=2, max_pages=50, verify_ssl=True):
+    def __init__(self, llm_analyzer, max_depth=2, max_pages=50, verify_ssl=True, crawl_workers=16,
+                 page_workers=8, parse_workers=None, respect_robots=False):
         """
         Initialize web scanner
         
@@ -30,13 +134,32 @@ class WebScanner:
             max_depth: Maximum crawl depth
             max_pages: Maximum pages to scan
             verify_ssl: Verify SSL certificates (default: True)
+            crawl_workers: Pages fetched concurrently while crawling
+            page_workers: Pages scanned (and sent to the LLM) concurrently
+            parse_workers: Worker processes parsing large pages (default:
+                           CPU count; below 2, pages are parsed in-process)
+            respect_robots: Skip links disallowed by the site's robots.txt
+                            (default: False; disallowed paths are often the
+                            interesting ones for a security scan)
         """
         self.llm = llm_analyzer
         self.max_depth = max_depth
         self.max_pages = max_pages
         self.verify_ssl = verify_ssl
+        self.crawl_workers = max(1, crawl_workers)
+        self.page_workers = max(1, page_workers)
+        self.parse_workers = parse_workers if parse_workers is not None else (os.cpu_count() or 1)
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self.respect_robots = respect_robots
+        # Requested URL -> page fetched with validators (see _remember_page)
+        self._page_cache: OrderedDict = OrderedDict()
+        self._page_cache_chars = 0
+        # _url_key of every URL fetched (kept across a pause/resume)
         self.visited_urls = set()
         self.session = None
+        # Connection pool kept across scan_url calls (see _get_connector)
+        self._connector = None
+        self._loop = None
     
     async def scan_url(self, start_url: str, modules: List[str] = None, resume_state: Dict = None) -> List[Dict[str, Any]]:
         """
@@ -59,6 +182,7 @@ class WebScanner:
             all_findings = resume_state.get('partial_results', [])
             print(f"[Web] ▶️ Resuming from {len(self.visited_urls)} visited pages")
         else:
+            self.visited_urls = set()
             all_findings = []
         
         # Create SSL context based on verify_ssl setting
@@ -69,21 +193,21 @@ class WebScanner:
         else:
             self.ssl_ctx = None  # Use default SSL verification
         
-        # Create persistent session with SSL configuration and common headers
-        connector = aiohttp.TCPConnector(
-            ssl=self.ssl_ctx,
-            limit=10,
-            enable_cleanup_closed=True,
-        )
+        # Create session on the shared connection pool with common headers
         headers = {
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
         }
-        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+        async with aiohttp.ClientSession(
+            connector=self._get_connector(),
+            connector_owner=False,
+            headers=headers
+        ) as session:
             self.session = session
+            tasks = []
             
             try:
                 # Crawl website
@@ -91,16 +215,25 @@ class WebScanner:
                 pages = await self._crawl(start_url)
                 print(f"[Web] Found {len(pages)} pages to scan")
                 
-                # Scan each page
-                for i, page_data in enumerate(pages):
-                    print(f"[Web] Scanning page {i+1}/{len(pages)}: {page_data['url']}")
-                    
-                    try:
+                # Scan pages concurrently so their LLM requests overlap
+                page_slots = asyncio.Semaphore(self.page_workers)
+                
+                async def scan_page(i, page_data):
+                    async with page_slots:
+                        print(f"[Web] Scanning page {i+1}/{len(pages)}: {page_data['url']}")
                         page_findings = await self._scan_page(page_data, modules)
-                        all_findings.extend(page_findings)
                         
                         # Memory optimization: release HTML after processing (Bug Fix #7)
                         page_data['html'] = None
+                        return page_findings
+                
+                tasks = [asyncio.create_task(scan_page(i, page_data)) for i, page_data in enumerate(pages)]
+                
+                # Collect results in page order, so a pause keeps the
+                # findings of exactly the pages before the failing one
+                for i, task in enumerate(tasks):
+                    try:
+                        all_findings.extend(await task)
                         
                     except APIError as api_err:
                         # API error occurred - save state and pause scan
@@ -126,6 +259,11 @@ class WebScanner:
                         )
                     
             finally:
+                # Stop pages still in flight after a pause or error
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                
                 # Always cleanup session reference (Bug Fix #3)
                 self.session = None
         
@@ -135,47 +273,163 @@ class WebScanner:
         print(f"[Web] Scan complete: {len(unique_findings)} vulnerabilities found")
         return unique_findings
     
+    def _get_connector(self) -> aiohttp.TCPConnector:
+        """
+        Return the connection pool for the running event loop
+        
+        The pool caches DNS lookups and keeps connections alive, so repeated
+        scans of a host skip the lookup and TLS handshake. Callers such as
+        the GUI run each scan in a new event loop, which gets a new pool.
+        """
+        loop = asyncio.get_running_loop()
+        if self._connector is None or self._connector.closed or loop is not self._loop:
+            self._loop = loop
+            self._connector = aiohttp.TCPConnector(
+                ssl=self.ssl_ctx,
+                limit=256,
+                limit_per_host=64,
+                use_dns_cache=True,
+                ttl_dns_cache=300,
+                keepalive_timeout=30,
+                force_close=False,
+                enable_cleanup_closed=True,
+            )
+        return self._connector
+    
+    async def close(self):
+        """Close the shared connection pool and the parse worker pool"""
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
+        if self._connector is not None:
+            await self._connector.close()
+            self._connector = None
+    
     async def _crawl(self, start_url: str) -> List[Dict[str, Any]]:
-        """Crawl website to discover pages"""
-        to_visit = [(start_url, 0)]  # (url, depth)
+        """Crawl website to discover pages, fetching up to crawl_workers pages at once"""
+        to_visit = asyncio.Queue()  # (url, depth)
+        to_visit.put_nowait((start_url, 0))
+        # Every URL ever queued; links repeated on each page (navigation,
+        # footer) are queued once instead of once per page
+        enqueued = {self._url_key(start_url), self._url_key(self._canonicalize(start_url))}
+        # Links queued per URL template, see PAGES_PER_TEMPLATE
+        template_counts = Counter([self._url_template(start_url)])
+        robots = await self._fetch_robots(start_url) if self.respect_robots else None
+        # Content signatures of the pages kept, to skip near-duplicate pages
+        signatures = set()
         pages = []
-        
-        while to_visit and len(pages) < self.max_pages:
-            url, depth = to_visit.pop(0)
-            
-            # Skip if already visited
-            if url in self.visited_urls:
-                continue
-            
-            # Skip if too deep
-            if depth > self.max_depth:
-                continue
-            
-            self.visited_urls.add(url)
-            
-            try:
-                # Fetch page with retry and HTTP fallback
-                page_data = await self._fetch_page_with_retry(url, depth, start_url)
-                if page_data:
+        # Pages fetched or being fetched, so in-flight fetches count toward max_pages
+        claimed = 0
+        
+        async def worker():
+            nonlocal claimed
+            while True:
+                url, depth = await to_visit.get()
+                url_key = self._url_key(url)
+                try:
+                    # Skip if already visited (resumed scans), too deep, or out of page budget
+                    if url_key in self.visited_urls or depth > self.max_depth or claimed >= self.max_pages:
+                        continue
+                    
+                    # No await between the check and the add, so no two
+                    # workers ever fetch the same URL
+                    self.visited_urls.add(url_key)
+                    claimed += 1
+                    
+                    try:
+                        # Fetch page with retry and HTTP fallback
+                        page_data = await self._fetch_page_with_retry(url, depth, start_url)
+                    except Exception as e:
+                        print(f"[Web] Error crawling {url}: {e}")
+                        page_data = None
+                    
+                    if not page_data:
+                        claimed -= 1
+                        continue
+                    
+                    # Same content under another URL: not worth another scan
+                    signature = page_data['signature']
+                    if signature is not None:
+                        if signature in signatures:
+                            claimed -= 1
+                            continue
+                        signatures.add(signature)
+                    
                     pages.append(page_data)
                     
-                    # Extract links for further crawling
-                    if depth < self.max_depth and page_data.get('html'):
+                    # Parse once; the form summaries are reused by _scan_page
+                    if page_data.get('html'):
                         try:
-                            soup = BeautifulSoup(page_data['html'], 'html.parser')
-                            links = self._extract_links(soup, page_data['url'], start_url)
+                            want_links = depth < self.max_depth
+                            
+                            # A page unchanged since an earlier scan keeps its parse
+                            if page_data['cached'] and (page_data['links'] is not None or not want_links):
+                                links = page_data['links'] if want_links else []
+                            else:
+                                # Extract links for further crawling
+                                links, page_data['forms'] = await self._parse_page(
+                                    page_data['html'], page_data['url'], start_url, want_links
+                                )
+                                if want_links:
+                                    page_data['links'] = links
+                                self._remember_page(page_data)
                             
                             for link in links:
-                                if link not in self.visited_urls:
-                                    to_visit.append((link, depth + 1))
+                                link_key = self._url_key(link)
+                                if link_key in enqueued or link_key in self.visited_urls:
+                                    continue
+                                # Rejected links stay in enqueued so they are judged once
+                                enqueued.add(link_key)
+                                
+                                template = self._url_template(link)
+                                if template_counts[template] >= PAGES_PER_TEMPLATE:
+                                    continue
+                                if robots is not None and not robots.can_fetch('*', link):
+                                    continue
+                                
+                                template_counts[template] += 1
+                                to_visit.put_nowait((link, depth + 1))
                         except Exception as e:
                             print(f"[Web] HTML parsing error for {url}: {e}")
-                
-            except Exception as e:
-                print(f"[Web] Error crawling {url}: {e}")
+                finally:
+                    to_visit.task_done()
+        
+        # The crawl is done once every queued URL has been handled
+        workers = [asyncio.create_task(worker()) for _ in range(self.crawl_workers)]
+        try:
+            await to_visit.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
         
         return pages
     
+    async def _fetch_robots(self, start_url: str) -> Optional[RobotFileParser]:
+        """
+        Fetch and parse the robots.txt of the start URL's host
+        
+        Returns:
+            The parsed rules, or None if robots.txt could not be fetched
+            (every link is then allowed)
+        """
+        parsed = urlparse(start_url)
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        
+        try:
+            timeout = aiohttp.ClientTimeout(total=15)
+            async with self.session.get(robots_url, timeout=timeout, ssl=getattr(self, 'ssl_ctx', None)) as response:
+                if response.status != 200:
+                    return None
+                text = await response.text(errors='replace')
+        except Exception as e:
+            print(f"[Web] Could not fetch {robots_url}: {e}")
+            return None
+        
+        robots = RobotFileParser(robots_url)
+        robots.parse(text.splitlines())
+        return robots
+    
     async def _fetch_page_with_retry(self, url: str, depth: int, start_url: str, max_retries: int = 3) -> Optional[Dict]:
         """Fetch page with retry logic and HTTP fallback"""
         urls_to_try = [url]
@@ -188,29 +442,58 @@ class WebScanner:
         ssl_param = getattr(self, 'ssl_ctx', None)
         
         for try_url in urls_to_try:
+            # Ask the server to skip the body if the page is unchanged
+            cached = self._page_cache.get(try_url)
+            conditional_headers = {}
+            if cached is not None:
+                etag, last_modified = cached['validators']
+                if etag:
+                    conditional_headers['If-None-Match'] = etag
+                if last_modified:
+                    conditional_headers['If-Modified-Since'] = last_modified
+            
             for attempt in range(max_retries):
                 try:
                     timeout = aiohttp.ClientTimeout(total=30, connect=15)
                     # Pass ssl explicitly per-request to ensure bypass takes effect
                     async with self.session.get(
                         try_url,
+                        headers=conditional_headers,
                         timeout=timeout,
                         allow_redirects=True,
                         ssl=ssl_param,
                     ) as response:
+                        if response.status == 304 and cached is not None:
+                            self._page_cache.move_to_end(try_url)
+                            return {**cached, 'depth': depth, 'cached': True}
+                        
                         try:
-                            html = await response.text(errors='replace')
+                            body = await self._read_body(response)
+                            # Trust the declared charset instead of sniffing
+                            try:
+                                html = body.decode(response.charset or 'utf-8', errors='replace')
+                            except LookupError:
+                                # Unknown charset name in Content-Type
+                                html = body.decode('utf-8', errors='replace')
                         except Exception as e:
                             print(f"[Web] Encoding error reading {try_url}: {e}")
                             return None
                         
-                        headers = dict(response.headers)
+                        # Copied so it outlives the response; lookups stay case-insensitive
+                        headers = CIMultiDict(response.headers)
                         
                         return {
                             'url': str(response.url),  # Use final URL after redirects
                             'status': response.status,
                             'headers': headers,
                             'html': html,
+                            'body_preview': html[:2000],  # Sent to the LLM
+                            'signature': self._content_signature(body) if body else None,
+                            'forms': [],  # Filled in by _crawl
+                            'links': None,  # Filled in by _crawl
+                            'request_url': try_url,
+                            'validators': (headers.get('ETag'), headers.get('Last-Modified')),
+                            'cached': False,
                             'depth': depth
                         }
                         
@@ -232,25 +515,131 @@ class WebScanner:
         
         return None
     
-    def _extract_links(self, soup: BeautifulSoup, current_url: str, base_url: str) -> List[str]:
+    async def _parse_page(self, html: str, page_url: str, base_url: str,
+                          want_links: bool) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Parse a page, in the worker pool when it is large (see parse_page)
+        
+        Tree building is pure CPU work; in the pool, pages are parsed on
+        several cores while the event loop keeps fetching.
+        """
+        if self.parse_workers < 2 or len(html) < PARSE_POOL_MIN_CHARS:
+            return parse_page(html, page_url, base_url, want_links)
+        
+        if self._parse_pool is None:
+            self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._parse_pool, parse_page, html, page_url, base_url, want_links)
+    
+    def _remember_page(self, page_data: Dict[str, Any]):
+        """
+        Keep a parsed page for conditional GETs on later scans
+        
+        Only pages the server sent an ETag or Last-Modified for are kept;
+        a 304 reply then reuses the body and parse stored here.
+        """
+        if not any(page_data['validators']):
+            return
+        
+        entry = {key: value for key, value in page_data.items() if key not in ('depth', 'cached')}
+        previous = self._page_cache.pop(page_data['request_url'], None)
+        if previous is not None:
+            self._page_cache_chars -= len(previous['html'])
+        self._page_cache[page_data['request_url']] = entry
+        self._page_cache_chars += len(entry['html'])
+        while len(self._page_cache) > PAGE_CACHE_SIZE or self._page_cache_chars > PAGE_CACHE_MAX_CHARS:
+            _, dropped = self._page_cache.popitem(last=False)
+            self._page_cache_chars -= len(dropped['html'])
+    
+    async def _read_body(self, response) -> bytes:
+        """
+        Read an HTML response body, at most MAX_RESPONSE_BYTES of it
+        
+        Args:
+            response: aiohttp response
+            
+        Returns:
+            Raw body, or b'' when the response is not HTML
+        """
+        content_type = response.headers.get('Content-Type', 'text/html').lower()
+        if not content_type.startswith(HTML_CONTENT_TYPES):
+            return b''
+        
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= MAX_RESPONSE_BYTES:
+                print(f"[Web] Truncated {response.url} at {MAX_RESPONSE_BYTES} bytes")
+                break
+        return b''.join(chunks)[:MAX_RESPONSE_BYTES]
+    
+    @staticmethod
+    def _extract_links(soup: BeautifulSoup, current_url: str, base_url: str) -> List[str]:
         """Extract valid links from page"""
         links = []
-        base_domain = urlparse(base_url).netloc
+        base_domain = urlparse(base_url).netloc.lower()
         
         for tag in soup.find_all('a', href=True):
             href = tag['href']
             
             # Resolve relative URLs
-            absolute_url = urljoin(current_url, href)
+            absolute_url = WebScanner._canonicalize(urljoin(current_url, href))
             
             # Only follow links on same domain
             if urlparse(absolute_url).netloc == base_domain:
-                # Remove fragment
-                url_without_fragment = absolute_url.split('#')[0]
-                links.append(url_without_fragment)
+                links.append(absolute_url)
         
         return links
     
+    @staticmethod
+    def _canonicalize(url: str) -> str:
+        """
+        Normalize a URL so permutations of the same page compare equal
+        
+        Lowercases scheme and host, drops the fragment and tracking
+        parameters (utm_*, session ids), sorts the remaining query
+        parameters and strips a trailing slash from the path.
+        """
+        parsed = urlparse(url)
+        path = parsed.path.rstrip('/') or '/'
+        query = urlencode(sorted(
+            (name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+            if not name.lower().startswith('utm_') and name.lower() not in TRACKING_PARAMS
+        ))
+        return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), path, parsed.params, query, ''))
+    
+    @staticmethod
+    def _url_key(url: str) -> int:
+        """
+        64-bit digest of a URL for the visited and queued sets
+        
+        An int takes a fraction of the memory of the URL string it stands
+        for, which matters once max_pages is raised for large crawls; a
+        collision needs billions of URLs to become likely.
+        """
+        return int.from_bytes(hashlib.blake2b(url.encode('utf-8', 'replace'), digest_size=8).digest(), 'big')
+    
+    @staticmethod
+    def _url_template(url: str) -> str:
+        """URL shape shared by pages of one listing: host, path and query with digits masked"""
+        parsed = urlparse(url)
+        path = _VOLATILE_RE.sub('*', parsed.path)
+        # Values are kept, so ?page=about and ?page=login stay apart while
+        # ?id=1 and ?id=2 share a template
+        params = sorted({
+            f"{name}={_VOLATILE_RE.sub('*', value)}"
+            for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        })
+        return f"{parsed.netloc}{path}?{'&'.join(params)}"
+    
+    @staticmethod
+    def _content_signature(body: bytes) -> bytes:
+        """Digest of the raw page body with digit runs removed, equal for near-duplicate pages"""
+        return hashlib.blake2b(_VOLATILE_BYTES_RE.sub(b'', body), digest_size=16).digest()
+    
     async def _scan_page(self, page_data: Dict, modules: List[str]) -> List[Dict[str, Any]]:
         """Scan individual page for vulnerabilities"""
         findings = []
@@ -273,18 +662,18 @@ class WebScanner:
                 'GET',
                 {
                     'status': page_data['status'],
-                    'headers': page_data['headers'],
-                    'body': page_data['html'][:2000]  # First 2000 chars
+                    'headers': dict(page_data['headers']),
+                    'body': page_data['body_preview']
                 }
             )
             findings.extend(llm_findings)
         
+        # The raw HTML is no longer needed; forms were summarized while crawling
+        page_data['html'] = None
+        
         # 4. Check forms for XSS/SQLi
         if 'xss' in modules or 'sqli' in modules:
-            soup = BeautifulSoup(page_data['html'], 'html.parser')
-            forms = soup.find_all('form')
-            
-            for form in forms:
+            for form in page_data['forms']:
                 form_findings = await self._analyze_form(url, form, modules)
                 findings.extend(form_findings)
         
@@ -293,23 +682,15 @@ class WebScanner:
     def _check_security_headers(self, page_data: Dict) -> List[Dict[str, Any]]:
         """Check for missing security headers"""
         findings = []
-        headers = {k.lower(): v for k, v in page_data['headers'].items()}
+        headers = page_data['headers']
         url = page_data['url']
         
         # Check for important security headers
-        security_headers = {
-            'x-frame-options': 'Missing X-Frame-Options header (Clickjacking risk)',
-            'x-content-type-options': 'Missing X-Content-Type-Options header',
-            'content-security-policy': 'Missing Content-Security-Policy header',
-            'strict-transport-security': 'Missing HSTS header (HTTP allowed)',
-            'x-xss-protection': 'Missing X-XSS-Protection header'
-        }
-        
-        for header, description in security_headers.items():
+        for header, (description, severity) in SECURITY_HEADERS.items():
             if header not in headers:
                 findings.append({
                     'type': 'missing_security_header',
-                    'severity': 'medium' if header != 'content-security-policy' else 'low',
+                    'severity': severity,
                     'url': url,
                     'description': description,
                     'remediation': f'Add {header} header to HTTP responses',
@@ -328,28 +709,28 @@ class WebScanner:
         url = page_data['url']
         
         # Check for version disclosure in headers
-        disclosure_headers = ['server', 'x-powered-by', 'x-aspnet-version']
-        headers_lower = {k.lower(): (k, v) for k, v in headers.items()}
+        disclosure_headers = ['Server', 'X-Powered-By', 'X-AspNet-Version']
         
         for header in disclosure_headers:
-            if header in headers_lower:
-                original_key, value = headers_lower[header]
+            value = headers.get(header)
+            if value is not None:
                 findings.append({
                     'type': 'info_disclosure',
                     'severity': 'low',
                     'url': url,
-                    'description': f'Server version disclosed in {header} header',
-                    'evidence': f"{original_key}: {value}",
-                    'remediation': f'Remove or obfuscate {header} header',
+                    'description': f'Server version disclosed in {header.lower()} header',
+                    'evidence': f"{header}: {value}",
+                    'remediation': f'Remove or obfuscate {header.lower()} header',
                     'source': 'static',
                     'confidence': 1.0
                 })
         
         # Check for comments with sensitive info
-        comments = re.findall(r'<!--(.*?)-->', html, re.DOTALL)
+        # The substring test is cheaper than the regex on comment-free pages
+        comments = _COMMENT_RE.findall(html) if '<!--' in html else []
         for comment in comments:
             # Look for potential sensitive patterns
-            if any(keyword in comment.lower() for keyword in ['password', 'api key', 'secret', 'token', 'TODO', 'FIXME']):
+            if _is_sensitive_comment(comment):
                 findings.append({
                     'type': 'info_disclosure',
                     'severity': 'low',
@@ -363,25 +744,11 @@ class WebScanner:
         
         return findings
     
-    async def _analyze_form(self, url: str, form, modules: List[str]) -> List[Dict[str, Any]]:
-        """Analyze form for vulnerabilities"""
+    async def _analyze_form(self, url: str, form: Dict[str, Any], modules: List[str]) -> List[Dict[str, Any]]:
+        """Analyze form (as summarized by summarize_form) for vulnerabilities"""
         findings = []
         
-        # Get form action and method
-        action = form.get('action', '')
-        method = form.get('method', 'get').upper()
-        
-        # Get all input fields
-        inputs = form.find_all('input')
-        
-        # Check for CSRF token
-        has_csrf_token = any(
-            'csrf' in input_tag.get('name', '').lower() or
-            'csrf' in input_tag.get('id', '').lower()
-            for input_tag in inputs
-        )
-        
-        if method == 'POST' and not has_csrf_token:
+        if form['method'] == 'POST' and not form['has_csrf_token']:
             findings.append({
                 'type': 'csrf',
                 'severity': 'medium',
@@ -401,11 +768,11 @@ class WebScanner:
         unique = []
         
         for finding in findings:
-            # Create unique key
+            # Create unique key; LLM findings may lack a description
             key = (
                 finding.get('type'),
                 finding.get('url'),
-                finding.get('description')[:50]  # First 50 chars
+                (finding.get('description') or '')[:50]  # First 50 chars
             )
             
             if key not in seen:
@@ -413,3 +780,42 @@ class WebScanner:
                 unique.append(finding)
         
         return unique
+
+
+def summarize_form(form) -> Dict[str, Any]:
+    """Reduce a form tag to the fields _analyze_form checks"""
+    # Get all input fields
+    inputs = form.find_all('input')
+    
+    return {
+        'action': form.get('action', ''),
+        'method': form.get('method', 'get').upper(),
+        # Check for CSRF token
+        'has_csrf_token': any(
+            _CSRF_RE.search(input_tag.attrs.get('name', '')) or
+            _CSRF_RE.search(input_tag.attrs.get('id', ''))
+            for input_tag in inputs
+        )
+    }
+
+
+def parse_page(html: str, page_url: str, base_url: str, want_links: bool) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Parse page HTML into its crawlable links and form summaries
+    
+    Runs in a worker process for large pages, so it takes and returns plain
+    data rather than the soup.
+    
+    Args:
+        html: Page HTML
+        page_url: Final URL of the page, for resolving relative links
+        base_url: Scan start URL; only links on its domain are kept
+        want_links: Extract links (False at the maximum crawl depth)
+        
+    Returns:
+        (links, forms)
+    """
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=_PAGE_TAGS)
+    links = WebScanner._extract_links(soup, page_url, base_url) if want_links else []
+    forms = [summarize_form(form) for form in soup.find_all('form')]
+    return links, forms